@@ -0,0 +1,108 @@
+"""
+Shared gRPC channel pool for the FastAPI gateways
+Keeps a few long-lived grpc.aio channels per upstream target so HTTP
+requests reuse HTTP/2 connections and await upstream calls instead of
+blocking the event loop
+"""
+import itertools
+import os
+from contextlib import contextmanager
+
+import grpc
+
+DEFAULT_POOL_SIZE = int(os.environ.get('GRPC_POOL_SIZE', '4'))
+
+# Per-call deadline (seconds) for upstream RPCs made by the gateways
+DEFAULT_TIMEOUT = float(os.environ.get('GRPC_TIMEOUT', '5'))
+
+# Deadline (seconds) for streaming exports, which may run much longer
+STREAM_TIMEOUT = float(os.environ.get('GRPC_STREAM_TIMEOUT', '300'))
+
+# Keepalive pings keep idle connections warm (and detect dead peers);
+# a local subchannel pool stops gRPC from collapsing our channels onto a
+# single shared TCP connection.
+DEFAULT_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.use_local_subchannel_pool', 1),
+]
+
+
+class _TargetPool:
+    """Channels and cached stubs for one upstream target"""
+
+    def __init__(self, target, size, options, interceptors=None):
+        self.target = target
+        self.channels = [
+            grpc.aio.insecure_channel(target, options=options, interceptors=interceptors) for _ in range(size)
+        ]
+        self.stubs = {}
+        self.next_index = itertools.count()
+        self.in_use = 0
+        self.calls = 0
+
+    def pick(self, stub_class):
+        """Return a stub on the next channel (round-robin)"""
+        index = next(self.next_index) % len(self.channels)
+        key = (stub_class, index)
+        stub = self.stubs.get(key)
+        if stub is None:
+            stub = self.stubs[key] = stub_class(self.channels[index])
+        return stub
+
+
+class ChannelPool:
+    """Pool of long-lived grpc.aio channels, keyed by upstream target
+
+    Must be created and used from the event loop that serves the app.
+    interceptors (grpc.aio client interceptors) are installed on every channel.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, options=None, interceptors=None):
+        if size < 1:
+            raise ValueError('Channel pool size must be at least 1')
+        self.size = size
+        self.options = list(options if options is not None else DEFAULT_CHANNEL_OPTIONS)
+        self.interceptors = list(interceptors) if interceptors else None
+        self._targets = {}
+        self._closed = False
+
+    def _target_pool(self, target):
+        pool = self._targets.get(target)
+        if pool is None:
+            if self._closed:
+                raise RuntimeError('Channel pool is closed')
+            pool = self._targets[target] = _TargetPool(target, self.size, self.options, self.interceptors)
+        return pool
+
+    @contextmanager
+    def stub(self, target, stub_class):
+        """Borrow a stub for `target`; tracks the call as in-use while inside the block"""
+        pool = self._target_pool(target)
+        pool.in_use += 1
+        pool.calls += 1
+        try:
+            yield pool.pick(stub_class)
+        finally:
+            pool.in_use -= 1
+
+    def stats(self):
+        """Pool size and in-use counters per target"""
+        return {
+            target: {
+                "channels": len(pool.channels),
+                "in_use": pool.in_use,
+                "calls": pool.calls,
+            }
+            for target, pool in self._targets.items()
+        }
+
+    async def close(self):
+        """Close every channel in the pool"""
+        self._closed = True
+        targets, self._targets = self._targets, {}
+        for pool in targets.values():
+            for channel in pool.channels:
+                await channel.close()
@@ -0,0 +1,23 @@
+"""
+ETag helpers for versioned gateway responses
+A resource at store version N is tagged "vN"
+"""
+
+
+def make_etag(version):
+    """ETag header value for a store version"""
+    return f'"v{version}"'
+
+
+def parse_etag(header):
+    """Store version named by an If-None-Match header, or 0 if there is none"""
+    for tag in (header or '').split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.startswith('"v') and tag.endswith('"'):
+            try:
+                return int(tag[2:-1])
+            except ValueError:
+                continue
+    return 0
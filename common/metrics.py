@@ -0,0 +1,596 @@
+"""
+Request metrics in the Prometheus text format
+Counters, gauges and histograms kept in a process-wide registry, filled by
+a gRPC server interceptor (sync and grpc.aio), a client interceptor for
+the gateways' upstream calls and an ASGI middleware for the FastAPI apps.
+Each web server renders the registry at /metrics.
+
+Recording is cheap enough to leave on: each method or route gets one
+recorder, created on its first call, that updates all of its series
+under a single lock (two acquisitions per call). Message sizes come from
+the (de)serializers gRPC runs anyway, so nothing is encoded twice.
+"""
+import asyncio
+import bisect
+import threading
+import time
+
+import grpc
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Bytes
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Route label for requests no route matched, so unknown paths cannot
+# blow up the number of series
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _CounterValue:
+    def __init__(self, lock=None):
+        self._lock = lock or threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class _HistogramValue:
+    def __init__(self, bounds, lock=None):
+        self._lock = lock or threading.Lock()
+        self.bounds = bounds
+        # One count per bound plus +Inf; not cumulative until rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.add(value)
+
+    def add(self, value):
+        """observe() for callers already holding the lock"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    """One metric name; a value per combination of label values"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _new_value(self, lock):
+        raise NotImplementedError
+
+    def labels(self, *values, lock=None):
+        """The value for these label values (created on first use)
+
+        A value created here guards its updates with lock, so a recorder
+        can update several values under one acquisition.
+        """
+        value = self._values.get(values)
+        if value is None:
+            with self._lock:
+                value = self._values.get(values)
+                if value is None:
+                    value = self._values[values] = self._new_value(lock)
+        return value
+
+    def _samples(self, labels, value):
+        with value._lock:
+            current = value.value
+        yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(current)}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, value in sorted(list(self._values.items())):
+            lines.extend(self._samples(labels, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_value(self, lock):
+        return _CounterValue(lock)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_value(self, lock):
+        return _GaugeValue(lock)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self, lock):
+        return _HistogramValue(self.buckets, lock)
+
+    def _samples(self, labels, value):
+        with value._lock:
+            counts = list(value.counts)
+            total = value.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+        yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}'
+        yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}'
+
+
+class Registry:
+    """The metrics of one process, rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._recorders = {}
+        # Reentrant: recorder factories register their metrics
+        self._lock = threading.RLock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f'{name} is already registered as a {metric.kind}')
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def recorder(self, key, factory):
+        """The one recorder for key, made by factory() on first use"""
+        recorder = self._recorders.get(key)
+        if recorder is None:
+            with self._lock:
+                recorder = self._recorders.get(key)
+                if recorder is None:
+                    recorder = self._recorders[key] = factory()
+        return recorder
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _split_method(full_method):
+    """'/user.UserService/GetUser' -> ('user.UserService', 'GetUser')"""
+    service, _, method = full_method.lstrip('/').rpartition('/')
+    return service, method
+
+
+def _rpc_type(handler):
+    if handler.unary_unary is not None:
+        return 'unary'
+    if handler.unary_stream is not None:
+        return 'server_stream'
+    if handler.stream_unary is not None:
+        return 'client_stream'
+    return 'bidi_stream'
+
+
+def _code_name(code):
+    return code.name if code is not None else 'OK'
+
+
+def rpc_metrics(side, registry, full_method, rpc_type, sizes=True):
+    """The recorder for full_method on side ('server' or 'client')"""
+    return registry.recorder(
+        ('grpc', side, full_method),
+        lambda: _RpcMetrics(side, registry, full_method, rpc_type, sizes)
+    )
+
+
+class _RpcMetrics:
+    """Recorder for the calls of one gRPC method; get it from rpc_metrics()"""
+
+    def __init__(self, side, registry, full_method, rpc_type, sizes):
+        labels = _split_method(full_method)
+        names = ('grpc_service', 'grpc_method')
+        lock = self._lock = threading.Lock()
+        self.labels = labels
+        self.type = rpc_type
+        self.handled = registry.counter(
+            f'grpc_{side}_handled_total', 'RPCs completed, by status code', names + ('grpc_type', 'grpc_code')
+        )
+        self.in_flight = registry.gauge(
+            f'grpc_{side}_in_flight', 'RPCs in progress', names
+        ).labels(*labels, lock=lock)
+        self.latency = registry.histogram(
+            f'grpc_{side}_handling_seconds', 'Time from start to completion of an RPC', names
+        ).labels(*labels, lock=lock)
+        if sizes:
+            self.received = registry.histogram(
+                f'grpc_{side}_msg_received_bytes', 'Size of each message received', names, SIZE_BUCKETS
+            ).labels(*labels, lock=lock)
+            self.sent = registry.histogram(
+                f'grpc_{side}_msg_sent_bytes', 'Size of each message sent', names, SIZE_BUCKETS
+            ).labels(*labels, lock=lock)
+        self._handled = {}
+
+    def start(self):
+        with self._lock:
+            self.in_flight.value += 1
+        return time.perf_counter()
+
+    def finish(self, started, code):
+        elapsed = time.perf_counter() - started
+        name = _code_name(code)
+        handled = self._handled.get(name)
+        if handled is None:
+            handled = self._handled[name] = self.handled.labels(*self.labels, self.type, name, lock=self._lock)
+        with self._lock:
+            self.in_flight.value -= 1
+            self.latency.add(elapsed)
+            handled.value += 1
+
+    def deserializer(self, deserialize):
+        """deserialize, also recording the size of each message"""
+        observe = self.received.observe
+
+        def wrapped(data):
+            observe(len(data))
+            return deserialize(data) if deserialize is not None else data
+        return wrapped
+
+    def serializer(self, serialize):
+        """serialize, also recording the size of each message"""
+        observe = self.sent.observe
+
+        def wrapped(message):
+            data = serialize(message) if serialize is not None else message
+            observe(len(data))
+            return data
+        return wrapped
+
+
+class _HandlerCache:
+    """Instrumented handler per method, built once"""
+
+    def __init__(self, registry, instrument):
+        self.registry = registry
+        self.instrument = instrument
+        self._handlers = {}
+
+    def get(self, full_method, handler):
+        if handler is None:
+            return None
+        cached = self._handlers.get(full_method)
+        if cached is not None and cached[0] is handler:
+            return cached[1]
+        metrics = rpc_metrics('server', self.registry, full_method, _rpc_type(handler))
+        wrapped = self.instrument(handler, metrics)
+        self._handlers[full_method] = (handler, wrapped)
+        return wrapped
+
+
+def _server_code(context, default=None):
+    code = context.code()
+    return code if code is not None else default
+
+
+def _instrument_sync(handler, metrics):
+    request_deserializer = metrics.deserializer(handler.request_deserializer)
+    response_serializer = metrics.serializer(handler.response_serializer)
+
+    if handler.unary_unary is not None:
+        behavior = handler.unary_unary
+
+        def unary_unary(request, context):
+            started = metrics.start()
+            code = grpc.StatusCode.UNKNOWN
+            try:
+                response = behavior(request, context)
+                code = _server_code(context)
+                return response
+            except Exception:
+                code = _server_code(context, grpc.StatusCode.UNKNOWN)
+                raise
+            finally:
+                metrics.finish(started, code)
+        return handler._replace(unary_unary=unary_unary, request_deserializer=request_deserializer,
+                                response_serializer=response_serializer)
+
+    if handler.unary_stream is not None:
+        behavior = handler.unary_stream
+
+        def unary_stream(request, context):
+            started = metrics.start()
+            code = grpc.StatusCode.UNKNOWN
+            try:
+                yield from behavior(request, context)
+                code = _server_code(context)
+            except GeneratorExit:
+                code = grpc.StatusCode.CANCELLED
+                raise
+            except Exception:
+                code = _server_code(context, grpc.StatusCode.UNKNOWN)
+                raise
+            finally:
+                metrics.finish(started, code)
+        return handler._replace(unary_stream=unary_stream, request_deserializer=request_deserializer,
+                                response_serializer=response_serializer)
+
+    # Client and bidi streams: sizes only
+    return handler._replace(request_deserializer=request_deserializer,
+                            response_serializer=response_serializer)
+
+
+def _instrument_async(handler, metrics):
+    request_deserializer = metrics.deserializer(handler.request_deserializer)
+    response_serializer = metrics.serializer(handler.response_serializer)
+
+    if handler.unary_unary is not None:
+        behavior = handler.unary_unary
+
+        async def unary_unary(request, context):
+            started = metrics.start()
+            code = grpc.StatusCode.UNKNOWN
+            try:
+                response = await behavior(request, context)
+                code = _server_code(context)
+                return response
+            except BaseException:
+                code = _server_code(context, grpc.StatusCode.UNKNOWN)
+                raise
+            finally:
+                metrics.finish(started, code)
+        return handler._replace(unary_unary=unary_unary, request_deserializer=request_deserializer,
+                                response_serializer=response_serializer)
+
+    if handler.unary_stream is not None:
+        behavior = handler.unary_stream
+
+        async def unary_stream(request, context):
+            started = metrics.start()
+            code = grpc.StatusCode.UNKNOWN
+            try:
+                responses = behavior(request, context)
+                if hasattr(responses, '__aiter__'):
+                    async for response in responses:
+                        yield response
+                else:
+                    # Written with context.write()
+                    await responses
+                code = _server_code(context)
+            except (GeneratorExit, asyncio.CancelledError):
+                code = grpc.StatusCode.CANCELLED
+                raise
+            except BaseException:
+                code = _server_code(context, grpc.StatusCode.UNKNOWN)
+                raise
+            finally:
+                metrics.finish(started, code)
+        return handler._replace(unary_stream=unary_stream, request_deserializer=request_deserializer,
+                                response_serializer=response_serializer)
+
+    return handler._replace(request_deserializer=request_deserializer,
+                            response_serializer=response_serializer)
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records every RPC a thread pool grpc.server handles"""
+
+    def __init__(self, registry=REGISTRY):
+        self._handlers = _HandlerCache(registry, _instrument_sync)
+
+    def intercept_service(self, continuation, handler_call_details):
+        return self._handlers.get(handler_call_details.method, continuation(handler_call_details))
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Records every RPC a grpc.aio server handles"""
+
+    def __init__(self, registry=REGISTRY):
+        self._handlers = _HandlerCache(registry, _instrument_async)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        return self._handlers.get(handler_call_details.method, await continuation(handler_call_details))
+
+
+class ClientMetricsInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+    """Records the unary calls made on grpc.aio channels
+
+    The gateways turn upstream failures into 200 responses with an
+    "error" key; grpc_client_handled_total still counts them by code.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self._methods = {}
+
+    def _metrics(self, full_method):
+        metrics = self._methods.get(full_method)
+        if metrics is None:
+            name = full_method.decode() if isinstance(full_method, bytes) else full_method
+            metrics = self._methods[full_method] = rpc_metrics('client', self.registry, name, 'unary', sizes=False)
+        return metrics
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        metrics = self._metrics(client_call_details.method)
+        started = metrics.start()
+        code = grpc.StatusCode.UNKNOWN
+        try:
+            call = await continuation(client_call_details, request)
+            code = await call.code()
+            return call
+        except asyncio.CancelledError:
+            code = grpc.StatusCode.CANCELLED
+            raise
+        finally:
+            metrics.finish(started, code)
+
+
+class _HttpMetrics:
+    """Recorder for the requests to one route"""
+
+    def __init__(self, registry, method, route):
+        labels = (method, route)
+        names = ('method', 'route')
+        lock = self._lock = threading.Lock()
+        self.labels = labels
+        self.requests = registry.counter(
+            'http_requests_total', 'HTTP requests completed, by status', names + ('status',)
+        )
+        self.in_flight = registry.gauge(
+            'http_requests_in_flight', 'HTTP requests in progress', names
+        ).labels(*labels, lock=lock)
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'Time from request to the end of the response', names
+        ).labels(*labels, lock=lock)
+        self.request_size = registry.histogram(
+            'http_request_size_bytes', 'Size of each request body', names, SIZE_BUCKETS
+        ).labels(*labels, lock=lock)
+        self.response_size = registry.histogram(
+            'http_response_size_bytes', 'Size of each response body', names, SIZE_BUCKETS
+        ).labels(*labels, lock=lock)
+        self._statuses = {}
+
+    def start(self):
+        with self._lock:
+            self.in_flight.value += 1
+        return time.perf_counter()
+
+    def finish(self, started, status, received, sent):
+        elapsed = time.perf_counter() - started
+        requests = self._statuses.get(status)
+        if requests is None:
+            requests = self._statuses[status] = self.requests.labels(*self.labels, str(status), lock=self._lock)
+        with self._lock:
+            self.in_flight.value -= 1
+            self.latency.add(elapsed)
+            self.request_size.add(received)
+            self.response_size.add(sent)
+            requests.value += 1
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording each HTTP request under its route template
+
+    routes is the app's route list (app.routes), matched the way the
+    router does so /api/users/42 counts as /api/users/{user_id}.
+    """
+
+    def __init__(self, app, routes=(), registry=REGISTRY):
+        self.app = app
+        self.routes = routes
+        self.registry = registry
+        self._table = []
+        self._recorders = {}
+
+    def _route(self, method, path):
+        # Built on the first request, once the app has all its routes
+        if len(self._table) != len(self.routes):
+            self._table = [
+                (route.path_regex.match, getattr(route, 'methods', None), route.path) for route in self.routes
+            ]
+        partial = None
+        for match, methods, template in self._table:
+            if match(path):
+                if methods is None or method in methods:
+                    return template
+                if partial is None:
+                    # Path matches, method does not: the router answers 405
+                    partial = template
+        return partial or UNMATCHED_ROUTE
+
+    def _metrics(self, method, path):
+        route = self._route(method, path)
+        metrics = self._recorders.get((method, route))
+        if metrics is None:
+            metrics = self._recorders[(method, route)] = self.registry.recorder(
+                ('http', method, route), lambda: _HttpMetrics(self.registry, method, route)
+            )
+        return metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        metrics = self._metrics(scope['method'], scope['path'])
+        started = metrics.start()
+        status = 500
+        received = 0
+        sent = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+            return message
+
+        async def counting_send(message):
+            nonlocal status, sent
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                sent += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            metrics.finish(started, status, received, sent)
@@ -0,0 +1,53 @@
+"""
+Request coalescing for the FastAPI gateways
+Concurrent requests for the same key share one in-flight upstream call,
+so a burst of identical requests costs a single RPC
+"""
+import asyncio
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome
+
+    Keys are tuples starting with the method name, which is also what the
+    counters are grouped by. The shared call runs as its own task, so a
+    caller that goes away does not cancel it for the others. Results are
+    shared objects and must not be modified. Must be used from one event
+    loop.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._counters = {}
+
+    def _count(self, key, field):
+        counters = self._counters.get(key[0])
+        if counters is None:
+            counters = self._counters[key[0]] = {"calls": 0, "coalesced": 0}
+        counters[field] += 1
+
+    async def do(self, key, fn):
+        """Await fn() for key, joining the call already running for it if any"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count(key, "coalesced")
+        else:
+            self._count(key, "calls")
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the error as seen even if every waiter went away
+            task.exception()
+
+    def stats(self):
+        """Upstream calls made and requests coalesced into them, per method"""
+        return {
+            "in_flight": len(self._in_flight),
+            "methods": {method: dict(counters) for method, counters in self._counters.items()},
+        }
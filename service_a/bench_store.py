@@ -0,0 +1,123 @@
+"""
+Memory benchmark for Service A's in-memory user stores
+Fills each store with synthetic users and reports resident memory per
+user, insert throughput and point-read latency. Every (store, rows)
+pair runs in a fresh process so the measurements do not mix.
+
+    python bench_store.py                        # dict and columnar, 1M rows
+    python bench_store.py --rows 10000000 --store columnar
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+STORES = ['dict', 'columnar']
+
+FIRST_NAMES = ['John', 'Jane', 'Bob', 'Alice', 'Somchai', 'Suda', 'Malee', 'Anan', 'Maria', 'Wei']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Williams', 'Sukjai', 'Wongsa', 'Chen', 'Garcia', 'Kim', 'Lee']
+
+
+def resident_bytes():
+    """Current resident set size (peak RSS where /proc is not available)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def make_store(name):
+    if name == 'columnar':
+        from columnar_store import ColumnarUserStore
+        return ColumnarUserStore()
+    from user_store import UserStore
+    return UserStore()
+
+
+def synthetic_users(start, count):
+    return [
+        (
+            f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)]}',
+            f'user{i}@example.com',
+            18 + i % 70
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def measure(store_name, rows, batch_size):
+    """Fill one store and return its measurements"""
+    store = make_store(store_name)
+    gc.collect()
+    before = resident_bytes()
+
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        store.create_many(synthetic_users(start, min(batch_size, rows - start)))
+    insert_seconds = time.perf_counter() - started
+    gc.collect()
+    used = resident_bytes() - before
+
+    user_ids = [random.randint(1, rows) for _ in range(10000)]
+    started = time.perf_counter()
+    for user_id in user_ids:
+        store.get_encoded(user_id)
+    read_seconds = time.perf_counter() - started
+
+    return {
+        "store": store_name,
+        "rows": rows,
+        "bytes_per_user": round(used / rows, 1),
+        "total_mb": round(used / 2**20, 1),
+        "inserts_per_second": round(rows / insert_seconds),
+        "get_encoded_us": round(read_seconds / len(user_ids) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory per user of the Service A stores')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000],
+                        help='Table sizes to fill (default: 1000000; the dict store needs '
+                             'about 1.3 GB per million users)')
+    parser.add_argument('--store', choices=STORES, nargs='+', default=STORES)
+    parser.add_argument('--batch-size', type=int, default=100000,
+                        help='Users per create_many call while filling (default: 100000)')
+    parser.add_argument('--json', action='store_true', help='Print one JSON object per run')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.store[0], args.rows[0], args.batch_size)))
+        return
+
+    if not args.json:
+        print(f'{"store":<10} {"rows":>10} {"bytes/user":>11} {"total MB":>10} {"inserts/s":>10} {"get µs":>8}')
+    for rows in args.rows:
+        for store_name in args.store:
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', '--store', store_name,
+                 '--rows', str(rows), '--batch-size', str(args.batch_size)],
+                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            if child.returncode != 0:
+                error = (child.stderr.strip().splitlines() or [f'exit code {child.returncode}'])[-1]
+                print(f'{store_name:<10} {rows:>10} failed: {error}')
+                continue
+            result = json.loads(child.stdout)
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f'{result["store"]:<10} {result["rows"]:>10} {result["bytes_per_user"]:>11} '
+                      f'{result["total_mb"]:>10} {result["inserts_per_second"]:>10} '
+                      f'{result["get_encoded_us"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Latency benchmark: gRPC over TCP loopback vs a Unix domain socket
+Starts a Service A gRPC server listening on both, then times sequential
+GetUser calls (one in flight, as a gateway handling a single request
+would) through each transport and reports p50/p99. Rounds alternate
+between the transports so background noise hits both alike.
+
+    python bench_transport.py
+    python bench_transport.py --calls 50000 --grpc-mode aio
+    python bench_transport.py --tcp localhost:50051 --uds unix:/tmp/service_a.sock   # running server
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+
+# Add the proto directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+
+import user_pb2
+import user_pb2_grpc
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def start_server(grpc_mode, addresses):
+    """Run grpc_server.py on addresses in a child process"""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grpc_server.py'),
+               '--grpc-mode', grpc_mode]
+    for address in addresses:
+        command += ['--listen', address]
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def time_calls(stub, calls):
+    """Latency (seconds) of each of `calls` sequential GetUser calls"""
+    request = user_pb2.UserRequest(user_id=1)
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        stub.GetUser(request)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(targets, calls, warmup, rounds):
+    """Measure each target; returns one result dict per target"""
+    channels = {name: grpc.insecure_channel(target) for name, target in targets.items()}
+    try:
+        stubs = {}
+        for name, channel in channels.items():
+            grpc.channel_ready_future(channel).result(timeout=10)
+            stubs[name] = user_pb2_grpc.UserServiceStub(channel)
+            time_calls(stubs[name], warmup)
+
+        latencies = {name: [] for name in targets}
+        per_round = max(calls // rounds, 1)
+        for _ in range(rounds):
+            for name, stub in stubs.items():
+                latencies[name] += time_calls(stub, per_round)
+    finally:
+        for channel in channels.values():
+            channel.close()
+
+    results = []
+    for name, values in latencies.items():
+        values.sort()
+        results.append({
+            "transport": name,
+            "target": targets[name],
+            "calls": len(values),
+            "p50_us": round(percentile(values, 50) * 1e6, 1),
+            "p99_us": round(percentile(values, 99) * 1e6, 1),
+            "mean_us": round(sum(values) / len(values) * 1e6, 1),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GetUser latency over TCP loopback and a Unix socket')
+    parser.add_argument('--calls', type=int, default=20000, help='Timed calls per transport (default: 20000)')
+    parser.add_argument('--warmup', type=int, default=1000, help='Untimed calls first (default: 1000)')
+    parser.add_argument('--rounds', type=int, default=10,
+                        help='Alternate between the transports this many times (default: 10)')
+    parser.add_argument('--grpc-mode', choices=['thread', 'aio'], default='thread',
+                        help='Server implementation to start (default: thread)')
+    parser.add_argument('--tcp', default=None, help='Measure this running server instead of starting one')
+    parser.add_argument('--uds', default=None, help='Unix socket target (unix:PATH) of the running server')
+    parser.add_argument('--json', action='store_true', help='Print one JSON object per transport')
+    args = parser.parse_args()
+
+    server = None
+    socket_dir = None
+    if args.tcp or args.uds:
+        targets = {name: target for name, target in (('tcp', args.tcp), ('uds', args.uds)) if target}
+    else:
+        socket_dir = tempfile.mkdtemp()
+        targets = {
+            'tcp': f'127.0.0.1:{free_port()}',
+            'uds': f'unix:{os.path.join(socket_dir, "service_a.sock")}',
+        }
+        server = start_server(args.grpc_mode, targets.values())
+
+    try:
+        results = run(targets, args.calls, args.warmup, args.rounds)
+    except grpc.FutureTimeoutError:
+        error = ''
+        if server is not None:
+            server.terminate()
+            error = server.communicate()[1].decode(errors='replace').strip()
+        sys.exit(f'Server did not become ready\n{error}'.strip())
+    finally:
+        if server is not None and server.poll() is None:
+            server.terminate()
+            server.wait()
+        if socket_dir is not None:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    print(f'{"transport":<10} {"calls":>8} {"p50 µs":>9} {"p99 µs":>9} {"mean µs":>9}')
+    for result in results:
+        print(f'{result["transport"]:<10} {result["calls"]:>8} {result["p50_us"]:>9} '
+              f'{result["p99_us"]:>9} {result["mean_us"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Fan-out of user changes to WatchUsers subscribers
+Publishing never blocks: each subscriber has a bounded queue, and a
+subscriber that falls behind is flagged as lagged instead of slowing the
+writer down. The watcher then resynchronises from the store.
+"""
+import threading
+from collections import deque
+
+DEFAULT_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """Bounded queue of changed user records for one watcher"""
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE, on_ready=None):
+        self.maxsize = maxsize
+        self._on_ready = on_ready
+        self._cond = threading.Condition()
+        self._users = deque()
+        self._lagged = False
+        self.dropped = 0
+
+    def offer(self, users):
+        """Queue changed users; on overflow drop everything and flag the subscriber as lagged"""
+        with self._cond:
+            if self._lagged:
+                self.dropped += len(users)
+                return
+            if len(self._users) + len(users) > self.maxsize:
+                self.dropped += len(self._users) + len(users)
+                self._users.clear()
+                self._lagged = True
+            else:
+                self._users.extend(users)
+            self._cond.notify()
+        if self._on_ready is not None:
+            self._on_ready()
+
+    def take(self, timeout=None):
+        """Drain the queue, waiting up to timeout if it is empty
+
+        Returns (users, lagged). When lagged is True changes were dropped
+        and the caller must resynchronise from the store.
+        """
+        with self._cond:
+            if timeout and not self._users and not self._lagged:
+                self._cond.wait(timeout)
+            users = list(self._users)
+            self._users.clear()
+            lagged, self._lagged = self._lagged, False
+            return users, lagged
+
+
+class ChangeBroadcaster:
+    """Publishes changed user records to every current subscriber"""
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, on_ready=None):
+        """Register a new subscriber; on_ready is called after each delivery"""
+        subscription = Subscription(self.queue_size, on_ready)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, users):
+        """Deliver changed user records to all subscribers"""
+        if not users:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(users)
@@ -0,0 +1,304 @@
+"""
+Columnar user storage for Service A
+Users live in parallel arrays instead of one dict per user: ages and
+creation times (epoch microseconds) in typed arrays, names and emails as
+UTF-8 in two byte arenas. A user costs tens of bytes instead of several
+hundred; the record dict, its ISO created_at string and the UserResponse
+bytes are only built when the user is read.
+"""
+import bisect
+import heapq
+import math
+import threading
+from array import array
+from datetime import datetime, timedelta
+
+from user_codec import encode_user
+from user_store import DuplicateEmailError, email_key, version_epoch
+
+# New emails go to a small sorted delta that is merged into the main
+# email-ordered array once it outgrows max(this, sqrt(rows)), so a create
+# costs O(sqrt(n)) instead of copying the whole array
+EMAIL_DELTA_MIN = 1024
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(moment):
+    """Naive datetime as microseconds since 1970-01-01 (no timezone conversion)"""
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def from_micros(micros):
+    """ISO string of a to_micros() value, as datetime.isoformat() writes it"""
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+class ColumnarUserStore:
+    """Append-only user table kept in column arrays
+
+    Same interface as user_store.UserStore. Row i holds user ID i + 1,
+    whose seq is the store's epoch + ID (as in shared_store). Writes are
+    serialized by one lock, and a row is complete before the published
+    row count covers it, so point reads and email lookups take no lock.
+
+    The secondary indexes are compact as well: an open-addressing hash
+    table of IDs for email, an ID array per age, an ID array per name
+    word (with a sorted list of the distinct words) and an array of IDs
+    ordered by email, plus a small delta of recent ones, for prefix search.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._ages = array('i')
+        self._created = array('q')
+        self._names = bytearray()
+        self._name_ends = array('Q')
+        self._emails = bytearray()
+        self._email_ends = array('Q')
+        # Hash table of user IDs keyed by email_key(email); 0 = empty slot
+        self._email_slots = array('i', [0]) * 8
+        self._email_count = 0
+        self._by_age = {}
+        self._words = []
+        self._word_ids = {}
+        self._by_email = array('i')
+        self._email_delta = array('i')
+        self._version_epoch = version_epoch()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def version(self):
+        """Monotonic counter bumped by every stored change (rows are append-only)"""
+        return self._version_epoch + self._count
+
+    @staticmethod
+    def _text(arena, ends, index):
+        start = ends[index - 1] if index else 0
+        return arena[start:ends[index]].decode('utf-8')
+
+    def _email_key(self, user_id):
+        return email_key(self._text(self._emails, self._email_ends, user_id - 1))
+
+    def _probe(self, slots, key):
+        """Slot holding key's user ID, or the empty slot where it would go"""
+        mask = len(slots) - 1
+        slot = hash(key) & mask
+        while slots[slot] and self._email_key(slots[slot]) != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _add_email(self, user_id, key):
+        slots = self._email_slots
+        if (self._email_count + 1) * 2 > len(slots):
+            # Keep the table at most half full; readers keep the old one meanwhile
+            old_slots, slots = slots, array('i', [0]) * (len(slots) * 2)
+            for old_id in old_slots:
+                if old_id:
+                    slots[self._probe(slots, self._email_key(old_id))] = old_id
+        slots[self._probe(slots, key)] = user_id
+        self._email_slots = slots
+        self._email_count += 1
+
+    def _check(self, users):
+        seen = set()
+        for _, email, _ in users:
+            if not email:
+                continue
+            key = email_key(email)
+            if key in seen or self.email_id(email) is not None:
+                raise DuplicateEmailError(f'Email {email} is already in use')
+            seen.add(key)
+
+    def _index(self, first_id, users):
+        """Add rows first_id.. (already published) to the secondary indexes"""
+        emails = []
+        for user_id, (name, email, age) in enumerate(users, start=first_id):
+            if email:
+                key = email_key(email)
+                self._add_email(user_id, key)
+                emails.append((key, user_id))
+            self._by_age.setdefault(age, array('i')).append(user_id)
+            for word in set(name.lower().split()):
+                word_ids = self._word_ids.get(word)
+                if word_ids is None:
+                    word_ids = self._word_ids[word] = array('i')
+                    bisect.insort(self._words, word)
+                word_ids.append(user_id)
+
+        self._email_delta = self._merge_emails(self._email_delta, sorted(emails))
+        if len(self._email_delta) > max(EMAIL_DELTA_MIN, math.isqrt(len(self._by_email))):
+            self._by_email = self._merge_emails(
+                self._by_email, [(self._email_key(user_id), user_id) for user_id in self._email_delta]
+            )
+            self._email_delta = array('i')
+
+    def _merge_emails(self, ordered, emails):
+        """Copy of the email-ordered ID array with sorted (key, user_id) pairs merged in"""
+        merged = array('i')
+        previous = 0
+        for key, user_id in emails:
+            position = bisect.bisect_right(ordered, key, lo=previous, key=self._email_key)
+            merged.extend(ordered[previous:position])
+            merged.append(user_id)
+            previous = position
+        merged.extend(ordered[previous:])
+        return merged
+
+    def create(self, name, email, age):
+        """Store a new user and return its record"""
+        return self.create_many([(name, email, age)])[0]
+
+    def create_many(self, users):
+        """Store several (name, email, age) users and return their records
+
+        All or nothing: raises DuplicateEmailError without storing anything
+        if any email is taken.
+        """
+        users = list(users)
+        encoded = [(name.encode('utf-8'), email.encode('utf-8')) for name, email, _ in users]
+        created_at = datetime.now()
+        created_micros = to_micros(created_at)
+
+        with self._lock:
+            self._check(users)
+            first_id = self._count + 1
+            for (_, _, age), (name_bytes, email_bytes) in zip(users, encoded):
+                self._names += name_bytes
+                self._name_ends.append(len(self._names))
+                self._emails += email_bytes
+                self._email_ends.append(len(self._emails))
+                self._ages.append(age)
+                self._created.append(created_micros)
+            self._count += len(users)
+            self._index(first_id, users)
+
+        created_at = created_at.isoformat()
+        return [
+            {
+                "user_id": user_id,
+                "name": name,
+                "email": email,
+                "age": age,
+                "created_at": created_at,
+                "seq": self._version_epoch + user_id
+            }
+            for user_id, (name, email, age) in enumerate(users, start=first_id)
+        ]
+
+    def get(self, user_id):
+        """Return the user record, or None if it does not exist"""
+        if not 1 <= user_id <= self._count:
+            return None
+        index = user_id - 1
+        return {
+            "user_id": user_id,
+            "name": self._text(self._names, self._name_ends, index),
+            "email": self._text(self._emails, self._email_ends, index),
+            "age": self._ages[index],
+            "created_at": from_micros(self._created[index]),
+            "seq": self._version_epoch + user_id
+        }
+
+    def get_many(self, user_ids):
+        """Return the record (or None) for each ID, in the same order"""
+        return [self.get(user_id) for user_id in user_ids]
+
+    def email_id(self, email):
+        """User ID registered for email, or None"""
+        slots = self._email_slots
+        return slots[self._probe(slots, email_key(email))] or None
+
+    def get_by_email(self, email):
+        """Return the user registered with email, or None"""
+        user_id = self.email_id(email)
+        return None if user_id is None else self.get(user_id)
+
+    def query_by_age(self, min_age, max_age, limit):
+        """Return up to `limit` users with min_age <= age <= max_age, ordered by age"""
+        user_ids = []
+        with self._lock:
+            for age in sorted(age for age in self._by_age if min_age <= age <= max_age):
+                user_ids.extend(self._by_age[age][:limit - len(user_ids)])
+                if len(user_ids) >= limit:
+                    break
+        return self.get_many(user_ids)
+
+    def _word_matches(self, prefix):
+        index = bisect.bisect_left(self._words, prefix)
+        while index < len(self._words) and self._words[index].startswith(prefix):
+            word = self._words[index]
+            for user_id in self._word_ids[word]:
+                yield word, user_id
+            index += 1
+
+    def _email_matches(self, prefix):
+        return heapq.merge(
+            self._ordered_email_matches(self._by_email, prefix),
+            self._ordered_email_matches(self._email_delta, prefix)
+        )
+
+    def _ordered_email_matches(self, ordered, prefix):
+        index = bisect.bisect_left(ordered, prefix, key=self._email_key)
+        while index < len(ordered):
+            user_id = ordered[index]
+            key = self._email_key(user_id)
+            if not key.startswith(prefix):
+                return
+            yield key, user_id
+            index += 1
+
+    def search(self, prefix, limit):
+        """Return up to `limit` users whose name words or email start with prefix"""
+        prefix = prefix.lower()
+        user_ids = []
+        with self._lock:
+            # Same order as UserIndexes.prefix_search: by (key, user_id)
+            for _, user_id in heapq.merge(self._word_matches(prefix), self._email_matches(prefix)):
+                if user_id not in user_ids:
+                    user_ids.append(user_id)
+                    if len(user_ids) >= limit:
+                        break
+        return self.get_many(user_ids)
+
+    def changes_since(self, since_seq):
+        """Users changed after since_seq, oldest change first
+
+        Returns (users, seq, full_snapshot). Rows are append-only, so only
+        a seq from before this store existed needs a full snapshot.
+        """
+        count = self._count
+        seq = self._version_epoch + count
+        if since_seq >= seq:
+            return [], seq, False
+        if since_seq < self._version_epoch:
+            return self.snapshot(), seq, True
+        return list(self.iter_users(since_seq - self._version_epoch)), seq, False
+
+    def iter_users(self, after_id=0):
+        """Yield user records with IDs above after_id, in ID order"""
+        for user_id in range(max(after_id, 0) + 1, self._count + 1):
+            yield self.get(user_id)
+
+    def get_encoded(self, user_id):
+        """Return the user's serialized UserResponse, or None"""
+        user = self.get(user_id)
+        return None if user is None else encode_user(user)
+
+    def iter_encoded(self, after_id=0):
+        """Yield (user_id, UserResponse bytes) for IDs above after_id, in ID order"""
+        for user in self.iter_users(after_id):
+            yield user["user_id"], encode_user(user)
+
+    def snapshot(self):
+        """Return every user record ordered by user ID"""
+        return list(self.iter_users())
+
+    def columns(self):
+        """Copies of the age and created_at (epoch µs) columns, in ID order"""
+        count = self._count
+        return self._ages[:count], self._created[:count]
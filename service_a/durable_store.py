@@ -0,0 +1,366 @@
+"""
+Durable user storage for Service A
+Every write is appended to a write-ahead log before it is acknowledged;
+concurrent writes share one fsync (group commit). A snapshot is written
+periodically and the log segments it covers are deleted. Startup maps
+the latest snapshot (users are read from it on demand, see mapped_store)
+and replays the log written after it.
+
+Files in the data directory:
+    snapshot-<seq>.map    latest snapshot (mapped_store format)
+    wal-<start seq>.log   log segments, oldest first
+    snapshot.bin          snapshot in the older framed format, still loaded
+Log segments are sequences of frames: payload length and CRC32
+(little-endian u32 each), then the payload, which is the change seq
+(i64) followed by the user's serialized UserResponse.
+"""
+import glob
+import itertools
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+# Add the proto directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+
+import user_pb2
+from user_store import UserStore
+from shared_store import encode_fields
+from mapped_store import MappedSnapshot, write_snapshot
+
+# Group-commit window (seconds): writes arriving within it share one fsync
+DEFAULT_FSYNC_INTERVAL = 0.002
+
+# Writes between snapshots
+DEFAULT_SNAPSHOT_EVERY = 100000
+
+FRAME = struct.Struct('<II')
+SEQ = struct.Struct('<q')
+# Framed snapshot header: magic, format version, seq it is current to, user count
+SNAPSHOT_HEADER = struct.Struct('<4sIqQ')
+SNAPSHOT_MAGIC = b'USNP'
+SNAPSHOT_FORMAT = 1
+
+# Snapshot written before the mapped format existed
+FRAMED_SNAPSHOT_FILE = 'snapshot.bin'
+
+
+class LogWriteError(OSError):
+    """Raised by writes once the write-ahead log has failed to write or fsync"""
+
+
+def _frame(seq, user_bytes):
+    payload = SEQ.pack(seq) + user_bytes
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_frames(data, offset=0):
+    """Yield (seq, user_bytes, end offset) for each intact frame from offset
+
+    Stops at the first truncated or corrupt frame (a torn write at the
+    tail of the log).
+    """
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or length < SEQ.size or zlib.crc32(payload) != crc:
+            return
+        offset = start + length
+        yield SEQ.unpack_from(payload)[0], payload[SEQ.size:], offset
+
+
+def _decode(seq, user_bytes):
+    user = user_pb2.UserResponse.FromString(user_bytes)
+    return {
+        "user_id": user.user_id,
+        "name": user.name,
+        "email": user.email,
+        "age": user.age,
+        "created_at": user.created_at,
+        "seq": seq
+    }
+
+
+def _fsync_dir(path):
+    if os.name == 'nt':
+        # Directories cannot be opened (or fsynced) on Windows
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _segment_path(data_dir, start_seq):
+    return os.path.join(data_dir, f'wal-{start_seq:020d}.log')
+
+
+def _numbered_files(data_dir, prefix, suffix):
+    """(number, path) of every <prefix><number><suffix> file, lowest first"""
+    files = []
+    for path in glob.glob(os.path.join(data_dir, f'{prefix}*{suffix}')):
+        try:
+            files.append((int(os.path.basename(path)[len(prefix):-len(suffix)]), path))
+        except ValueError:
+            continue
+    return sorted(files)
+
+
+def _segments(data_dir):
+    """(start seq, path) of every log segment, oldest first"""
+    return _numbered_files(data_dir, 'wal-', '.log')
+
+
+def _snapshots(data_dir):
+    """(seq, path) of every mapped snapshot, oldest first"""
+    return _numbered_files(data_dir, 'snapshot-', '.map')
+
+
+class _Rotate:
+    """Log queue marker: switch to a new segment starting at start_seq"""
+
+    def __init__(self, start_seq):
+        self.start_seq = start_seq
+
+
+class WriteAheadLog:
+    """Append-only log with group commit
+
+    append() only queues frames; a flusher thread writes everything queued,
+    waits `fsync_interval` for more writers to join, and makes the batch
+    durable with a single fsync. wait() blocks until a given append is
+    durable. With fsync=False batches are only flushed to the OS, which
+    survives a process crash but not a power loss. After a failed write
+    or fsync the log stops: append(), wait() and check() raise
+    LogWriteError.
+    """
+
+    def __init__(self, data_dir, start_seq, fsync=True, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.data_dir = data_dir
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._cond = threading.Condition()
+        self._queue = []
+        self._appended = 0
+        self._durable = 0
+        self._error = None
+        self._closed = False
+        self._file = open(_segment_path(data_dir, start_seq), 'ab')
+        _fsync_dir(data_dir)
+        self.commits = 0
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def append(self, frames):
+        """Queue frames for writing; returns a ticket for wait()"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Write-ahead log is closed')
+            self._raise_error()
+            self._queue.extend(frames)
+            self._appended += 1
+            self._cond.notify_all()
+            return self._appended
+
+    def rotate(self, start_seq):
+        """Start a new segment after everything appended so far"""
+        with self._cond:
+            self._queue.append(_Rotate(start_seq))
+            self._cond.notify_all()
+
+    def wait(self, ticket):
+        """Block until the append that returned ticket is durable"""
+        with self._cond:
+            while self._durable < ticket:
+                self._raise_error()
+                self._cond.wait()
+
+    def check(self):
+        """Raise LogWriteError if the log has failed"""
+        with self._cond:
+            self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise LogWriteError(f'Write-ahead log failed: {self._error}')
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+            if self.fsync_interval > 0:
+                time.sleep(self.fsync_interval)
+            with self._cond:
+                batch, self._queue = self._queue, []
+                appended = self._appended
+            try:
+                self._write(batch)
+            except OSError as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = appended
+                self.commits += 1
+                self._cond.notify_all()
+
+    def _write(self, batch):
+        frames = []
+        for item in batch:
+            if isinstance(item, _Rotate):
+                self._commit(b''.join(frames))
+                frames = []
+                self._file.close()
+                self._file = open(_segment_path(self.data_dir, item.start_seq), 'ab')
+                _fsync_dir(self.data_dir)
+            else:
+                frames.append(item)
+        self._commit(b''.join(frames))
+
+    def _commit(self, data):
+        if data:
+            self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Write out everything queued and close the current segment"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        self._file.close()
+
+
+class DurableUserStore(UserStore):
+    """UserStore persisted to a directory with a write-ahead log and snapshots
+
+    Writes are visible to readers as soon as they are applied in memory
+    and are acknowledged (create/create_many return) once their log
+    records are durable. Users in the mapped snapshot stay on disk until
+    read; only the log tail is loaded into memory, and the secondary
+    indexes are built in the background (writes and indexed lookups wait
+    for them). Once the log fails to write, the store fails closed: every
+    later write raises LogWriteError before touching memory. Records of
+    the batches in flight at the failure stay visible but are never
+    acknowledged, and are gone after a restart. Names and emails are
+    limited to the snapshot's fixed record width. Not for use across
+    forked workers.
+    """
+
+    # create/create_many block until the log is durable (see the aio servicer)
+    blocking_writes = True
+
+    def __init__(self, data_dir, fsync=True, fsync_interval=DEFAULT_FSYNC_INTERVAL,
+                 snapshot_every=DEFAULT_SNAPSHOT_EVERY):
+        os.makedirs(data_dir, exist_ok=True)
+        snapshots = _snapshots(data_dir)
+        base = MappedSnapshot(snapshots[-1][1]) if snapshots else None
+        super().__init__(base=base)
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self._recover(base.seq if base is not None else 0)
+        self._snapshot_lock = threading.Lock()
+        self._writes_since_snapshot = 0
+        self._wal = WriteAheadLog(data_dir, self.version + 1, fsync, fsync_interval)
+        threading.Thread(target=self.build_indexes, daemon=True).start()
+
+    def _recover(self, snapshot_seq):
+        """Load the log written after the mapped snapshot (or an older framed snapshot)"""
+        rows = {}
+        path = os.path.join(self.data_dir, FRAMED_SNAPSHOT_FILE)
+        if not snapshot_seq and os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, fmt, snapshot_seq, count = SNAPSHOT_HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC or fmt != SNAPSHOT_FORMAT:
+                raise ValueError(f'{path} is not a user snapshot')
+            for seq, user_bytes, _ in _read_frames(data, SNAPSHOT_HEADER.size):
+                rows[seq] = user_bytes
+            if len(rows) != count:
+                raise ValueError(f'{path} is truncated ({len(rows)} of {count} users)')
+
+        for _, segment in _segments(self.data_dir):
+            with open(segment, 'rb') as f:
+                data = f.read()
+            end = 0
+            for seq, user_bytes, end in _read_frames(data):
+                if seq > snapshot_seq:
+                    rows[seq] = user_bytes
+            if end < len(data):
+                # Drop a torn tail so later appends start on a frame boundary
+                with open(segment, 'r+b') as f:
+                    f.truncate(end)
+
+        if rows:
+            seqs = sorted(rows)
+            self.load([_decode(seq, rows[seq]) for seq in seqs], [rows[seq] for seq in seqs])
+
+    def create_many(self, users):
+        users = list(users)
+        for name, email, _ in users:
+            encode_fields(name, email)
+        # Fail closed: nothing reaches memory once the log cannot be written
+        self._wal.check()
+        records = super().create_many(users)
+        ticket = self._wal.append(
+            [_frame(user["seq"], self.get_encoded(user["user_id"])) for user in records]
+        )
+        self._wal.wait(ticket)
+        self._writes_since_snapshot += len(records)
+        if self._writes_since_snapshot >= self.snapshot_every and not self._snapshot_lock.locked():
+            threading.Thread(target=self.write_snapshot, daemon=True).start()
+        return records
+    create_many.__doc__ = UserStore.create_many.__doc__
+
+    def write_snapshot(self):
+        """Write a snapshot of the current table and delete the log it covers"""
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        try:
+            # Holding the index lock blocks writers, so every user up to
+            # max_user_id is stored and the log rotates at exactly seq
+            with self._index_lock:
+                seq = self.version
+                max_user_id = self._last_user_id
+                self._wal.rotate(seq + 1)
+                self._writes_since_snapshot = 0
+
+            path = os.path.join(self.data_dir, f'snapshot-{seq:020d}.map')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                users = itertools.takewhile(
+                    lambda user: user["user_id"] <= max_user_id, self.iter_users()
+                )
+                write_snapshot(f, users, seq, max_user_id)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            _fsync_dir(self.data_dir)
+            self.rebase(MappedSnapshot(path))
+
+            stale = [old for old_seq, old in _snapshots(self.data_dir) if old_seq < seq]
+            stale += [segment for start_seq, segment in _segments(self.data_dir) if start_seq <= seq]
+            stale.append(os.path.join(self.data_dir, FRAMED_SNAPSHOT_FILE))
+            for old in stale:
+                try:
+                    os.remove(old)
+                except OSError:
+                    # Missing, or still mapped (Windows): retried after the next snapshot
+                    pass
+        finally:
+            self._snapshot_lock.release()
+
+    def close(self):
+        """Flush the log; the store must not be written afterwards"""
+        self._wal.close()
@@ -1,112 +1,624 @@
 import grpc
 from concurrent import futures
+import asyncio
+import atexit
+import itertools
+import multiprocessing
+import socket
+import threading
 import time
-from datetime import datetime
 import sys
 import os
 
-# Add the proto directory to the path
+# Add proto and shared directories to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
 
 import user_pb2
 import user_pb2_grpc
+from user_store import UserStore, DuplicateEmailError, add_sample_users
+from shared_store import SharedUserStore, StoreFullError
+from durable_store import DurableUserStore, LogWriteError, DEFAULT_FSYNC_INTERVAL, DEFAULT_SNAPSHOT_EVERY
+from columnar_store import ColumnarUserStore
+from user_codec import encode_user_list, encode_not_modified
+from broadcaster import ChangeBroadcaster
+from user_stats import UserStatsCache
+from metrics import MetricsInterceptor, AsyncMetricsInterceptor
+
+# Largest page ListUsers returns, whatever page_size asks for
+MAX_PAGE_SIZE = 1000
+
+# Most users a single BatchGetUsers / BatchCreateUsers call may carry
+MAX_BATCH_SIZE = 1000
+
+# Result sizes for SearchUsers
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
+
+# Worker threads of a thread mode server
+THREAD_POOL_WORKERS = 10
+
+# Most WatchUsers streams a thread mode server keeps open at once. Each
+# holds a pool thread for as long as it is open, so the cap leaves most
+# of the pool to ordinary calls; grpc.aio servers have no such limit.
+MAX_THREAD_WATCHERS = 4
+
+# How often (seconds) an idle WatchUsers stream checks the store for
+# changes it was not told about, e.g. writes made by another worker process
+WATCH_POLL_SECONDS = 1.0
 
 
 class UserServiceServicer(user_pb2_grpc.UserServiceServicer):
     """Implementation of UserService"""
     
-    def __init__(self):
-        # In-memory storage for users
-        self.users = {}
-        self.next_user_id = 1
-        
-        # Add some sample users
-        self._add_sample_users()
-    
-    def _add_sample_users(self):
-        """Add sample users for testing"""
-        sample_users = [
-            {"name": "John Doe", "email": "john@example.com", "age": 30},
-            {"name": "Jane Smith", "email": "jane@example.com", "age": 25},
-            {"name": "Bob Johnson", "email": "bob@example.com", "age": 35},
-        ]
-        
-        for user_data in sample_users:
-            self.users[self.next_user_id] = {
-                "user_id": self.next_user_id,
-                "name": user_data["name"],
-                "email": user_data["email"],
-                "age": user_data["age"],
-                "created_at": datetime.now().isoformat()
-            }
-            self.next_user_id += 1
+    def __init__(self, store=None):
+        if store is None:
+            # In-memory storage for users, with some sample users
+            store = UserStore()
+            add_sample_users(store)
+        self.store = store
+        # (store version, encoded UserListResponse) of the last full listing
+        self._list_cache = None
+        # Fans every successful write out to the WatchUsers streams
+        self.broadcaster = ChangeBroadcaster()
+        # Open WatchUsers streams, each holding a server thread
+        self._watch_slots = threading.BoundedSemaphore(MAX_THREAD_WATCHERS)
+        # Aggregates, recomputed only after the store changes
+        self.stats = UserStatsCache(store)
+    
+    def _may_block(self, write=False, indexed=False):
+        """Whether a store call may block for long instead of only touching memory
+
+        Writes to a durable store wait for disk, and writes and indexed
+        lookups wait while the indexes are still being built.
+        """
+        if write and getattr(self.store, 'blocking_writes', False):
+            return True
+        indexes_ready = getattr(self.store, 'indexes_ready', None)
+        return (write or indexed) and indexes_ready is not None and not indexes_ready()
+    
+    @staticmethod
+    def _to_response(user):
+        return user_pb2.UserResponse(
+            user_id=user["user_id"],
+            name=user["name"],
+            email=user["email"],
+            age=user["age"],
+            created_at=user["created_at"]
+        )
     
     def GetUser(self, request, context):
         """Get user by ID"""
         user_id = request.user_id
+        user = self.store.get(user_id)
         
-        if user_id not in self.users:
+        if user is None:
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details(f'User with ID {user_id} not found')
             return user_pb2.UserResponse()
         
-        user = self.users[user_id]
-        return user_pb2.UserResponse(
-            user_id=user["user_id"],
-            name=user["name"],
-            email=user["email"],
-            age=user["age"],
-            created_at=user["created_at"]
+        return self._to_response(user)
+    
+    def BatchGetUsers(self, request, context):
+        """Get several users by ID in one call"""
+        if len(request.user_ids) > MAX_BATCH_SIZE:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f'At most {MAX_BATCH_SIZE} user IDs per batch')
+            return user_pb2.BatchGetUsersResponse()
+        
+        response = user_pb2.BatchGetUsersResponse()
+        for user_id, user in zip(request.user_ids, self.store.get_many(request.user_ids)):
+            if user is None:
+                response.missing_ids.append(user_id)
+            else:
+                response.users.append(self._to_response(user))
+        return response
+    
+    def GetUserByEmail(self, request, context):
+        """Get user by email"""
+        user = self.store.get_by_email(request.email)
+        
+        if user is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f'User with email {request.email} not found')
+            return user_pb2.UserResponse()
+        
+        return self._to_response(user)
+    
+    def QueryUsersByAge(self, request, context):
+        """List users within an age range, ordered by age"""
+        if request.min_age > request.max_age:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('min_age must not be greater than max_age')
+            return user_pb2.UserListResponse()
+        
+        limit = request.limit if 0 < request.limit < MAX_PAGE_SIZE else MAX_PAGE_SIZE
+        users = self.store.query_by_age(request.min_age, request.max_age, limit)
+        return user_pb2.UserListResponse(
+            users=[self._to_response(user) for user in users if user is not None]
+        )
+    
+    def SearchUsers(self, request, context):
+        """Prefix search over user name words and emails"""
+        prefix = request.prefix.strip()
+        if not prefix:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details('prefix must not be empty')
+            return user_pb2.UserListResponse()
+        
+        limit = min(request.limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+        users = self.store.search(prefix, limit)
+        return user_pb2.UserListResponse(
+            users=[self._to_response(user) for user in users if user is not None]
+        )
+    
+    def ListUsersSince(self, request, context):
+        """Users created or changed after since_seq (delta sync)"""
+        users, seq, full_snapshot = self.store.changes_since(request.since_seq)
+        return user_pb2.UserChangesResponse(
+            users=[self._to_response(user) for user in users if user is not None],
+            seq=seq,
+            full_snapshot=full_snapshot
+        )
+    
+    def _user_stats(self, request):
+        """UserStatsResponse for request; raises ValueError for invalid parameters"""
+        version, stats = self.stats.get(
+            request.age_buckets, request.percentiles, request.created_bucket_seconds
+        )
+        return user_pb2.UserStatsResponse(
+            count=stats["count"],
+            min_age=stats["min_age"],
+            max_age=stats["max_age"],
+            mean_age=stats["mean_age"],
+            age_percentiles=[user_pb2.AgePercentile(**p) for p in stats["age_percentiles"]],
+            age_histogram=[user_pb2.AgeBucket(**bucket) for bucket in stats["age_histogram"]],
+            ages_below_buckets=stats["ages_below_buckets"],
+            created=[user_pb2.CreatedBucket(**bucket) for bucket in stats["created"]],
+            version=version
         )
     
+    def UserStats(self, request, context):
+        """Aggregate statistics over all users"""
+        try:
+            return self._user_stats(request)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return user_pb2.UserStatsResponse()
+    
+    @staticmethod
+    def _set_write_error(context, error):
+        """Map a store write error to a gRPC status"""
+        if isinstance(error, StoreFullError):
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+        elif isinstance(error, DuplicateEmailError):
+            context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+        elif isinstance(error, LogWriteError):
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+        else:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(str(error))
+    
     def CreateUser(self, request, context):
         """Create a new user"""
-        user_id = self.next_user_id
-        self.next_user_id += 1
+        try:
+            user = self.store.create(request.name, request.email, request.age)
+        except (ValueError, StoreFullError, DuplicateEmailError, LogWriteError) as e:
+            self._set_write_error(context, e)
+            return user_pb2.UserResponse()
         
-        user = {
-            "user_id": user_id,
-            "name": request.name,
-            "email": request.email,
-            "age": request.age,
-            "created_at": datetime.now().isoformat()
-        }
+        self.broadcaster.publish([user])
+        return self._to_response(user)
+    
+    def BatchCreateUsers(self, request, context):
+        """Create several users in one call (all or nothing)"""
+        if len(request.users) > MAX_BATCH_SIZE:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f'At most {MAX_BATCH_SIZE} users per batch')
+            return user_pb2.UserListResponse()
         
-        self.users[user_id] = user
+        try:
+            users = self.store.create_many(
+                (user.name, user.email, user.age) for user in request.users
+            )
+        except (ValueError, StoreFullError, DuplicateEmailError, LogWriteError) as e:
+            self._set_write_error(context, e)
+            return user_pb2.UserListResponse()
         
-        return user_pb2.UserResponse(
-            user_id=user["user_id"],
-            name=user["name"],
-            email=user["email"],
-            age=user["age"],
-            created_at=user["created_at"]
-        )
+        self.broadcaster.publish(users)
+        return user_pb2.UserListResponse(users=[self._to_response(user) for user in users])
+    
+    @staticmethod
+    def _page_start(request, context):
+        """Decode page_token into the last user ID already returned"""
+        if not request.page_token:
+            return 0
+        try:
+            return int(request.page_token)
+        except ValueError:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f'Invalid page_token {request.page_token!r}')
+            return None
+    
+    @staticmethod
+    def _take_page(rows, page_size, user_id_of):
+        """Cut one page from an ID-ordered iterator; returns (rows, next_page_token)"""
+        if page_size <= 0:
+            return list(rows), ''
+        
+        # Fetch one extra row to know whether another page follows
+        page_size = min(page_size, MAX_PAGE_SIZE)
+        page = list(itertools.islice(rows, page_size + 1))
+        if len(page) > page_size:
+            page.pop()
+            return page, str(user_id_of(page[-1]))
+        return page, ''
     
     def ListUsers(self, request, context):
-        """List all users"""
-        users = []
-        for user in self.users.values():
-            users.append(user_pb2.UserResponse(
-                user_id=user["user_id"],
-                name=user["name"],
-                email=user["email"],
-                age=user["age"],
-                created_at=user["created_at"]
-            ))
-        
-        return user_pb2.UserListResponse(users=users)
-
-
-def serve():
-    """Start the gRPC server"""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    user_pb2_grpc.add_UserServiceServicer_to_server(UserServiceServicer(), server)
-    
-    port = '50051'
-    server.add_insecure_port(f'[::]:{port}')
+        """List users, one page at a time when page_size is set"""
+        after_id = self._page_start(request, context)
+        if after_id is None:
+            return user_pb2.UserListResponse()
+        
+        # Read the version before the rows, so it never claims newer data
+        version = self.store.version
+        if request.if_version and request.if_version == version:
+            return user_pb2.UserListResponse(version=version, not_modified=True)
+        
+        page, next_page_token = self._take_page(
+            self.store.iter_users(after_id), request.page_size, lambda user: user["user_id"]
+        )
+        return user_pb2.UserListResponse(
+            users=[self._to_response(user) for user in page],
+            next_page_token=next_page_token,
+            version=version
+        )
+    
+    def StreamUsers(self, request, context):
+        """Stream users in ID order (page_size caps the count, 0 = all)"""
+        after_id = self._page_start(request, context)
+        if after_id is None:
+            return
+        
+        users = self.store.iter_users(after_id)
+        if request.page_size > 0:
+            users = itertools.islice(users, request.page_size)
+        for user in users:
+            yield self._to_response(user)
+    
+    def _watch_step(self, last_seq, users, resync=False):
+        """Turn users delivered to a watcher into events; returns (events, last_seq)
+
+        Delivered users are sent as they are while their seqs follow on from
+        last_seq. The watcher resynchronises from the store's changes_since()
+        instead when asked to, when its subscription overflowed, when a seq
+        is missing from the run, or when nothing was delivered but the store
+        has moved on (a write made by another worker process).
+        """
+        events = []
+        if not resync and not users:
+            resync = self.store.version > last_seq
+        if not resync:
+            for user in users:
+                if user["seq"] <= last_seq:
+                    continue
+                if user["seq"] != last_seq + 1:
+                    resync = True
+                    break
+                events.append(user_pb2.UserEvent(
+                    type=user_pb2.UserEvent.CHANGED, user=self._to_response(user), seq=user["seq"]
+                ))
+                last_seq = user["seq"]
+        if not resync:
+            return events, last_seq
+        
+        changed, seq, full_snapshot = self.store.changes_since(last_seq)
+        if full_snapshot:
+            events.append(user_pb2.UserEvent(type=user_pb2.UserEvent.RESET, seq=seq))
+        events.extend(
+            user_pb2.UserEvent(
+                type=user_pb2.UserEvent.CHANGED, user=self._to_response(user), seq=user["seq"]
+            )
+            for user in changed
+            if user is not None and (full_snapshot or user["seq"] > last_seq)
+        )
+        events.append(user_pb2.UserEvent(type=user_pb2.UserEvent.SYNCED, seq=seq))
+        return events, seq
+    
+    def WatchUsers(self, request, context):
+        """Stream user changes as they happen
+
+        Starts with the changes after since_seq (or just a SYNCED marker
+        when it is 0). A watcher too slow to keep up with its bounded queue
+        loses the queued changes and is caught up from the store instead,
+        with a RESET and the whole table if the changelog no longer reaches
+        back far enough. Each open stream holds one server thread, so
+        beyond MAX_THREAD_WATCHERS streams new ones fail with
+        RESOURCE_EXHAUSTED.
+        """
+        if not self._watch_slots.acquire(blocking=False):
+            context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                f'At most {MAX_THREAD_WATCHERS} WatchUsers streams per thread mode server; '
+                'use --grpc-mode aio for more'
+            )
+        subscription = self.broadcaster.subscribe()
+        try:
+            events, last_seq = self._watch_step(
+                request.since_seq or self.store.version, [], resync=True
+            )
+            yield from events
+            while context.is_active():
+                users, lagged = subscription.take(WATCH_POLL_SECONDS)
+                events, last_seq = self._watch_step(last_seq, users, lagged)
+                yield from events
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+            self._watch_slots.release()
+    
+    # Pre-serialized variants, registered with identity response serializers
+    # by add_user_service_to_server: they return the cached UserResponse
+    # bytes from the store instead of building message objects.
+    
+    def GetUserBytes(self, request, context):
+        """GetUser answered from the store's cached bytes"""
+        user_bytes = self.store.get_encoded(request.user_id)
+        
+        if user_bytes is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f'User with ID {request.user_id} not found')
+            return b''
+        
+        return user_bytes
+    
+    def ListUsersBytes(self, request, context):
+        """ListUsers assembled from the store's cached bytes
+
+        The full (unpaginated) listing is cached per store version, and a
+        caller passing the current version as if_version gets a tiny
+        not_modified reply instead of the list.
+        """
+        after_id = self._page_start(request, context)
+        if after_id is None:
+            return b''
+        
+        # Read the version before the rows, so it never claims newer data
+        version = self.store.version
+        if request.if_version and request.if_version == version:
+            return encode_not_modified(version)
+        
+        full_listing = after_id == 0 and request.page_size <= 0
+        if full_listing:
+            cached = self._list_cache
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        
+        page, next_page_token = self._take_page(
+            self.store.iter_encoded(after_id), request.page_size, lambda row: row[0]
+        )
+        response = encode_user_list(
+            (user_bytes for _, user_bytes in page), next_page_token, version
+        )
+        if full_listing:
+            self._list_cache = (version, response)
+        return response
+    
+    def StreamUsersBytes(self, request, context):
+        """StreamUsers sending the store's cached bytes"""
+        after_id = self._page_start(request, context)
+        if after_id is None:
+            return
+        
+        rows = self.store.iter_encoded(after_id)
+        if request.page_size > 0:
+            rows = itertools.islice(rows, request.page_size)
+        for _, user_bytes in rows:
+            yield user_bytes
+
+
+async def _call(blocking, handler, *args):
+    """handler(*args), on a worker thread when it may block the event loop"""
+    if blocking:
+        return await asyncio.to_thread(handler, *args)
+    return handler(*args)
+
+
+class AsyncUserServiceServicer(UserServiceServicer):
+    """UserService for grpc.aio servers
+
+    Handlers that only touch in-memory state run inline on the event loop
+    instead of being dispatched to a thread pool. Those that may wait on
+    the store (writes to a DurableUserStore wait for their fsync; writes
+    and indexed lookups wait while the indexes are built at startup) run
+    on a worker thread, so the loop keeps serving other calls meanwhile.
+    """
+
+    async def GetUser(self, request, context):
+        return UserServiceServicer.GetUser(self, request, context)
+
+    async def CreateUser(self, request, context):
+        return await _call(self._may_block(write=True), UserServiceServicer.CreateUser, self, request, context)
+
+    async def ListUsers(self, request, context):
+        return UserServiceServicer.ListUsers(self, request, context)
+
+    async def BatchGetUsers(self, request, context):
+        return UserServiceServicer.BatchGetUsers(self, request, context)
+
+    async def BatchCreateUsers(self, request, context):
+        return await _call(
+            self._may_block(write=True), UserServiceServicer.BatchCreateUsers, self, request, context
+        )
+
+    async def GetUserByEmail(self, request, context):
+        return await _call(
+            self._may_block(indexed=True), UserServiceServicer.GetUserByEmail, self, request, context
+        )
+
+    async def QueryUsersByAge(self, request, context):
+        return await _call(
+            self._may_block(indexed=True), UserServiceServicer.QueryUsersByAge, self, request, context
+        )
+
+    async def SearchUsers(self, request, context):
+        return await _call(
+            self._may_block(indexed=True), UserServiceServicer.SearchUsers, self, request, context
+        )
+
+    async def ListUsersSince(self, request, context):
+        return UserServiceServicer.ListUsersSince(self, request, context)
+
+    async def UserStats(self, request, context):
+        """UserStats computed on a worker thread: a cold cache reads every user"""
+        try:
+            return await asyncio.to_thread(self._user_stats, request)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return user_pb2.UserStatsResponse()
+
+    async def WatchUsers(self, request, context):
+        """WatchUsers that waits on the event loop instead of holding a thread"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscription = self.broadcaster.subscribe(
+            on_ready=lambda: loop.call_soon_threadsafe(ready.set)
+        )
+        try:
+            events, last_seq = self._watch_step(
+                request.since_seq or self.store.version, [], resync=True
+            )
+            for event in events:
+                yield event
+            while True:
+                try:
+                    await asyncio.wait_for(ready.wait(), WATCH_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                ready.clear()
+                users, lagged = subscription.take()
+                events, last_seq = self._watch_step(last_seq, users, lagged)
+                for event in events:
+                    yield event
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+
+    async def StreamUsers(self, request, context):
+        for response in UserServiceServicer.StreamUsers(self, request, context):
+            yield response
+
+    async def GetUserBytes(self, request, context):
+        return UserServiceServicer.GetUserBytes(self, request, context)
+
+    async def ListUsersBytes(self, request, context):
+        return UserServiceServicer.ListUsersBytes(self, request, context)
+
+    async def StreamUsersBytes(self, request, context):
+        for user_bytes in UserServiceServicer.StreamUsersBytes(self, request, context):
+            yield user_bytes
+
+
+class _HandlerCapture:
+    """Stand-in server that records the handlers generated code registers"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def add_generic_rpc_handlers(self, generic_handlers):
+        pass
+
+    def add_registered_method_handlers(self, service_name, method_handlers):
+        self.handlers.update(method_handlers)
+
+
+def add_user_service_to_server(servicer, server):
+    """Register UserService, serving GetUser/ListUsers/StreamUsers from cached bytes
+
+    Starts from the generated handler table and swaps those methods for
+    handlers whose response serializer is the identity, so the servicer's
+    *Bytes methods hand pre-encoded protobuf straight to gRPC.
+    """
+    capture = _HandlerCapture()
+    user_pb2_grpc.add_UserServiceServicer_to_server(servicer, capture)
+    handlers = capture.handlers
+    
+    handlers['GetUser'] = grpc.unary_unary_rpc_method_handler(
+        servicer.GetUserBytes,
+        request_deserializer=user_pb2.UserRequest.FromString,
+    )
+    handlers['ListUsers'] = grpc.unary_unary_rpc_method_handler(
+        servicer.ListUsersBytes,
+        request_deserializer=user_pb2.ListUsersRequest.FromString,
+    )
+    handlers['StreamUsers'] = grpc.unary_stream_rpc_method_handler(
+        servicer.StreamUsersBytes,
+        request_deserializer=user_pb2.ListUsersRequest.FromString,
+    )
+    
+    generic_handler = grpc.method_handlers_generic_handler('user.UserService', handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('user.UserService', handlers)
+
+
+# Accept the keepalive pings sent by the gateways' pooled channels
+SERVER_OPTIONS = [
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.min_recv_ping_interval_without_data_ms', 20000),
+    ('grpc.http2.max_ping_strikes', 0),
+]
+
+
+PORT = '50051'
+
+
+def _server_options(reuse_port):
+    if reuse_port:
+        return SERVER_OPTIONS + [('grpc.so_reuseport', 1)]
+    return SERVER_OPTIONS
+
+
+def make_servicer(mode='thread', store=None):
+    """The servicer serve() uses for mode"""
+    if mode == 'aio':
+        return AsyncUserServiceServicer(store)
+    return UserServiceServicer(store)
+
+
+def listen_addresses(listen=None):
+    """Addresses to bind: the given ones, or TCP port 50051 on every interface"""
+    return list(listen) if listen else [f'[::]:{PORT}']
+
+
+def serve(mode='thread', max_concurrent_rpcs=None, store=None, reuse_port=False, servicer=None,
+          listen=None):
+    """Start the gRPC server
+
+    mode is 'thread' (thread pool of THREAD_POOL_WORKERS workers) or 'aio' (grpc.aio on an
+    event loop); max_concurrent_rpcs rejects calls beyond that many in flight.
+    servicer, from make_servicer(mode, store), is built here when not given.
+    listen lists the addresses to bind: host:port for TCP, unix:PATH for a
+    Unix domain socket (default: port 50051).
+    """
+    if servicer is None:
+        servicer = make_servicer(mode, store)
+    if mode == 'aio':
+        asyncio.run(serve_async(max_concurrent_rpcs, store, reuse_port, servicer, listen))
+        return
+    
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=THREAD_POOL_WORKERS),
+        options=_server_options(reuse_port),
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
+        interceptors=[MetricsInterceptor()]
+    )
+    add_user_service_to_server(servicer, server)
+    
+    for address in listen_addresses(listen):
+        server.add_insecure_port(address)
     server.start()
     
-    print(f'🚀 gRPC Server started on port {port}')
+    print(f'🚀 gRPC Server started on {", ".join(listen_addresses(listen))}')
     print(f'📡 Listening for requests...')
     
     try:
@@ -117,5 +629,125 @@ def serve():
         server.stop(0)
 
 
+async def serve_async(max_concurrent_rpcs=None, store=None, reuse_port=False, servicer=None,
+                      listen=None):
+    """Start the gRPC server on grpc.aio"""
+    if servicer is None:
+        servicer = AsyncUserServiceServicer(store)
+    server = grpc.aio.server(
+        options=_server_options(reuse_port),
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
+        interceptors=[AsyncMetricsInterceptor()]
+    )
+    add_user_service_to_server(servicer, server)
+    
+    for address in listen_addresses(listen):
+        server.add_insecure_port(address)
+    await server.start()
+    
+    print(f'🚀 gRPC Server (asyncio) started on {", ".join(listen_addresses(listen))}')
+    print(f'📡 Listening for requests...')
+    
+    try:
+        await server.wait_for_termination()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print('\n⏹️  Server stopped')
+        await server.stop(0)
+
+
+def serve_prefork(workers, mode='thread', max_concurrent_rpcs=None, capacity=None, listen=None):
+    """Fork `workers` gRPC server processes that share port 50051 and one user store
+
+    Each worker binds the port (or the TCP addresses in listen) with
+    SO_REUSEPORT so the kernel spreads connections across them. Must run
+    before any gRPC channel or server is created in this process. Returns
+    the worker processes.
+    """
+    if not hasattr(os, 'fork') or not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError('Multi-process mode needs fork() and SO_REUSEPORT (Linux)')
+    if any(address.startswith('unix:') for address in listen_addresses(listen)):
+        raise RuntimeError('Worker processes cannot share a Unix socket; listen on TCP')
+    
+    store = SharedUserStore(capacity) if capacity else SharedUserStore()
+    add_sample_users(store)
+    
+    context = multiprocessing.get_context('fork')
+    processes = []
+    for _ in range(workers):
+        process = context.Process(
+            target=serve,
+            args=(mode, max_concurrent_rpcs, store, True),
+            kwargs={'listen': listen},
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+    
+    print(f'🧩 Started {workers} gRPC worker processes sharing {", ".join(listen_addresses(listen))}')
+    return processes
+
+
+def add_server_arguments(parser):
+    """Register the gRPC server command-line options"""
+    parser.add_argument('--grpc-mode', choices=['thread', 'aio'], default='thread',
+                        help='gRPC server implementation (default: thread)')
+    parser.add_argument('--max-concurrent-rpcs', type=int, default=None,
+                        help='Reject RPCs beyond this many in flight (default: unlimited)')
+    parser.add_argument('--listen', action='append', default=None, metavar='ADDRESS',
+                        help='Address to serve on, host:port or unix:PATH; repeat for several '
+                             f'(default: [::]:{PORT})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='gRPC worker processes sharing the port via SO_REUSEPORT (Linux only)')
+    parser.add_argument('--max-users', type=int, default=None,
+                        help='Capacity of the shared user store in multi-process mode')
+    parser.add_argument('--store', choices=['dict', 'columnar'], default='dict',
+                        help='In-memory layout: a dict per user, or compact column arrays (default: dict)')
+    parser.add_argument('--data-dir', default=None,
+                        help='Persist users in this directory (write-ahead log + snapshots)')
+    parser.add_argument('--fsync-interval', type=float, default=DEFAULT_FSYNC_INTERVAL * 1000,
+                        help='Group-commit window in ms: writes within it share one fsync (default: 2)')
+    parser.add_argument('--no-fsync', action='store_true',
+                        help='Do not fsync the log (survives a process crash, not a power loss)')
+    parser.add_argument('--snapshot-every', type=int, default=DEFAULT_SNAPSHOT_EVERY,
+                        help='Writes between snapshots (default: 100000)')
+
+
+def open_store(args):
+    """Store selected by the command-line options, or None for the in-memory default"""
+    if args.store == 'columnar':
+        if args.data_dir is not None or args.workers > 1:
+            raise ValueError('--store columnar cannot be combined with --data-dir or --workers')
+        store = ColumnarUserStore()
+        add_sample_users(store)
+        return store
+    if args.data_dir is None:
+        return None
+    if args.workers > 1:
+        raise ValueError('--data-dir cannot be combined with --workers')
+    store = DurableUserStore(
+        args.data_dir,
+        fsync=not args.no_fsync,
+        fsync_interval=args.fsync_interval / 1000,
+        snapshot_every=args.snapshot_every
+    )
+    atexit.register(store.close)
+    if len(store) == 0:
+        add_sample_users(store)
+    return store
+
+
 if __name__ == '__main__':
-    serve()
+    import argparse
+    parser = argparse.ArgumentParser(description='Service A gRPC server')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    try:
+        store = open_store(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers > 1:
+        for process in serve_prefork(args.workers, args.grpc_mode,
+                                     args.max_concurrent_rpcs, args.max_users, args.listen):
+            process.join()
+    else:
+        serve(args.grpc_mode, args.max_concurrent_rpcs, store, listen=args.listen)
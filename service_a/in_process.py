@@ -0,0 +1,113 @@
+"""
+In-process UserService transport for Service A
+When the web gateway runs in the same process as the gRPC server, its
+calls can go straight to the servicer: no protobuf serialization, no
+loopback connection and no HTTP/2 framing. InProcessUserServiceStub has
+the call shapes of the grpc.aio stub, so gateway code works with either.
+"""
+import asyncio
+
+import grpc
+
+from grpc_server import AsyncUserServiceServicer
+import user_pb2
+
+
+class InProcessRpcError(grpc.RpcError):
+    """Non-OK status set by the servicer, raised like grpc.aio's AioRpcError"""
+
+    def __init__(self, code, details):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+    def __str__(self):
+        return f'<InProcessRpcError status = {self._code} details = "{self._details}">'
+
+
+class _Context:
+    """The part of a grpc ServicerContext the servicer uses"""
+
+    def __init__(self):
+        self._code = grpc.StatusCode.OK
+        self._details = ''
+        self.active = True
+
+    def set_code(self, code):
+        self._code = code
+
+    def set_details(self, details):
+        self._details = details
+
+    def is_active(self):
+        return self.active
+
+    def check(self):
+        if self._code != grpc.StatusCode.OK:
+            raise InProcessRpcError(self._code, self._details)
+
+
+class _StreamCall:
+    """Async iterator over a streaming handler, with the aio call's cancel()"""
+
+    def __init__(self, handler, request):
+        self._context = _Context()
+        self._responses = handler(request, self._context)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._responses.__anext__()
+        except StopAsyncIteration:
+            self._context.check()
+            raise
+
+    def cancel(self):
+        if not self._context.active:
+            return False
+        self._context.active = False
+        # Closing runs the handler's cleanup (e.g. WatchUsers unsubscribing)
+        asyncio.ensure_future(self._responses.aclose())
+        return True
+
+
+def _unary_unary(handler):
+    async def call(request, timeout=None, metadata=None, **kwargs):
+        context = _Context()
+        response = await handler(request, context)
+        context.check()
+        return response
+    return call
+
+
+def _unary_stream(handler):
+    def call(request, timeout=None, metadata=None, **kwargs):
+        return _StreamCall(handler, request)
+    return call
+
+
+class InProcessUserServiceStub:
+    """UserService stub that calls a servicer in this process
+
+    Calls go through AsyncUserServiceServicer's handlers whatever mode the
+    gRPC server runs in, so they are safe to await on the gateway's event
+    loop: in-memory work runs inline; UserStats, writes to a durable store
+    and lookups during an index build run on a worker thread.
+    Responses are the servicer's own message objects. Deadlines (timeout)
+    and metadata are accepted for compatibility and ignored.
+    """
+
+    def __init__(self, servicer):
+        service = user_pb2.DESCRIPTOR.services_by_name['UserService']
+        for method in service.methods:
+            handler = getattr(AsyncUserServiceServicer, method.name).__get__(servicer)
+            wrap = _unary_stream if method.server_streaming else _unary_unary
+            setattr(self, method.name, wrap(handler))
@@ -2,18 +2,52 @@
 Service A - gRPC Server + Web Interface
 Main entry point with both gRPC and HTTP server
 """
+import argparse
 import threading
-from grpc_server import serve as serve_grpc
-from web_server import serve as serve_web
+from grpc_server import (
+    serve as serve_grpc, serve_prefork, add_server_arguments, open_store, make_servicer, PORT
+)
+from in_process import InProcessUserServiceStub
+from web_server import serve as serve_web, use_local_stub, USER_SERVICE_TARGET
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Service A - gRPC + Web')
+    add_server_arguments(parser)
+    parser.add_argument('--no-in-process', action='store_true',
+                        help='Send web API calls to the gRPC server over the network even '
+                             'when it runs in this process')
+    args = parser.parse_args()
+    try:
+        store = open_store(args)
+    except ValueError as e:
+        parser.error(str(e))
+
     print('=' * 50)
     print('Starting Service A')
     print('=' * 50)
-    
-    # Start gRPC server in a separate thread
-    grpc_thread = threading.Thread(target=serve_grpc, daemon=True)
-    grpc_thread.start()
-    
+
+    if args.workers > 1:
+        # Fork gRPC worker processes before anything else touches gRPC
+        serve_prefork(args.workers, args.grpc_mode, args.max_concurrent_rpcs, args.max_users,
+                      args.listen)
+    else:
+        servicer = make_servicer(args.grpc_mode, store)
+        # The web API calls the servicer directly, unless it was pointed
+        # at another server
+        own_targets = [f'localhost:{PORT}'] + [
+            address for address in args.listen or [] if address.startswith('unix:')
+        ]
+        if not args.no_in_process and USER_SERVICE_TARGET in own_targets:
+            use_local_stub(InProcessUserServiceStub(servicer))
+
+        # Start gRPC server in a separate thread
+        grpc_thread = threading.Thread(
+            target=serve_grpc,
+            args=(args.grpc_mode, args.max_concurrent_rpcs, store),
+            kwargs={'servicer': servicer, 'listen': args.listen},
+            daemon=True
+        )
+        grpc_thread.start()
+
     # Start web server in main thread
-    serve_web()
\ No newline at end of file
+    serve_web()
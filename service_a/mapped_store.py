@@ -0,0 +1,107 @@
+"""
+Memory-mapped user snapshots for Service A
+A snapshot is a table of fixed-width records plus an offset index keyed
+by user ID, so users can be served straight from the mapped file: nothing
+is decoded until a user is read, opening a snapshot takes the same time
+whatever its size, and its pages live in the OS page cache, shared by
+every process that maps the file.
+
+Layout (little-endian):
+    header   magic b'USNM', format version (u32), seq (i64),
+             user count (u64), max user ID (u64)
+    index    record offset (i64) for each user ID 0..max user ID, -1 if absent
+    records  user_id (i32), age (i32), seq (i64), created_at (32 bytes,
+             ASCII), name, email (UTF-8, NUL padded), in ID order
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from user_codec import encode_user
+from shared_store import MAX_NAME_BYTES, MAX_EMAIL_BYTES, encode_fields
+
+HEADER = struct.Struct('<4sIqQQ')
+OFFSET = struct.Struct('<q')
+RECORD = struct.Struct(f'<iiq32s{MAX_NAME_BYTES}s{MAX_EMAIL_BYTES}s')
+MAGIC = b'USNM'
+FORMAT = 1
+
+# Records packed per write() call
+_WRITE_CHUNK = 4096
+
+
+def write_snapshot(f, users, seq, max_user_id):
+    """Write users (ID order, IDs up to max_user_id) to the seekable file f"""
+    index = array('q', [-1]) * (max_user_id + 1)
+    records_start = HEADER.size + OFFSET.size * (max_user_id + 1)
+    f.seek(records_start)
+    count = 0
+    chunk = []
+    for user in users:
+        name_bytes, email_bytes = encode_fields(user["name"], user["email"])
+        index[user["user_id"]] = records_start + count * RECORD.size
+        chunk.append(RECORD.pack(
+            user["user_id"], user["age"], user["seq"],
+            user["created_at"].encode('ascii'), name_bytes, email_bytes
+        ))
+        count += 1
+        if len(chunk) >= _WRITE_CHUNK:
+            f.write(b''.join(chunk))
+            chunk = []
+    f.write(b''.join(chunk))
+
+    if sys.byteorder != 'little':
+        index.byteswap()
+    f.seek(HEADER.size)
+    f.write(index.tobytes())
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, FORMAT, seq, count, max_user_id))
+    return count
+
+
+class MappedSnapshot:
+    """Read-only view of a snapshot file, decoding records on access"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, self.seq, self._count, self.max_user_id = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f'{path} is not a mapped user snapshot')
+        expected = HEADER.size + OFFSET.size * (self.max_user_id + 1) + RECORD.size * self._count
+        if len(self._map) < expected:
+            raise ValueError(f'{path} is truncated')
+
+    def __len__(self):
+        return self._count
+
+    def get(self, user_id):
+        """Return the user record, or None if it is not in the snapshot"""
+        if not 0 < user_id <= self.max_user_id:
+            return None
+        offset = OFFSET.unpack_from(self._map, HEADER.size + OFFSET.size * user_id)[0]
+        if offset < 0:
+            return None
+        user_id, age, seq, created_at, name, email = RECORD.unpack_from(self._map, offset)
+        return {
+            "user_id": user_id,
+            "name": name.rstrip(b'\0').decode('utf-8'),
+            "email": email.rstrip(b'\0').decode('utf-8'),
+            "age": age,
+            "created_at": created_at.rstrip(b'\0').decode('ascii'),
+            "seq": seq
+        }
+
+    def get_encoded(self, user_id):
+        """Return the user's serialized UserResponse, or None"""
+        user = self.get(user_id)
+        return None if user is None else encode_user(user)
+
+    def iter_users(self, after_id=0):
+        """Yield user records with IDs above after_id, in ID order"""
+        for user_id in range(max(after_id, 0) + 1, self.max_user_id + 1):
+            user = self.get(user_id)
+            if user is not None:
+                yield user
@@ -47,9 +47,54 @@ class UserServiceStub(object):
                 _registered_method=True)
         self.ListUsers = channel.unary_unary(
                 '/user.UserService/ListUsers',
-                request_serializer=user__pb2.Empty.SerializeToString,
+                request_serializer=user__pb2.ListUsersRequest.SerializeToString,
                 response_deserializer=user__pb2.UserListResponse.FromString,
                 _registered_method=True)
+        self.StreamUsers = channel.unary_stream(
+                '/user.UserService/StreamUsers',
+                request_serializer=user__pb2.ListUsersRequest.SerializeToString,
+                response_deserializer=user__pb2.UserResponse.FromString,
+                _registered_method=True)
+        self.BatchGetUsers = channel.unary_unary(
+                '/user.UserService/BatchGetUsers',
+                request_serializer=user__pb2.BatchGetUsersRequest.SerializeToString,
+                response_deserializer=user__pb2.BatchGetUsersResponse.FromString,
+                _registered_method=True)
+        self.BatchCreateUsers = channel.unary_unary(
+                '/user.UserService/BatchCreateUsers',
+                request_serializer=user__pb2.BatchCreateUsersRequest.SerializeToString,
+                response_deserializer=user__pb2.UserListResponse.FromString,
+                _registered_method=True)
+        self.GetUserByEmail = channel.unary_unary(
+                '/user.UserService/GetUserByEmail',
+                request_serializer=user__pb2.EmailRequest.SerializeToString,
+                response_deserializer=user__pb2.UserResponse.FromString,
+                _registered_method=True)
+        self.QueryUsersByAge = channel.unary_unary(
+                '/user.UserService/QueryUsersByAge',
+                request_serializer=user__pb2.AgeRangeRequest.SerializeToString,
+                response_deserializer=user__pb2.UserListResponse.FromString,
+                _registered_method=True)
+        self.SearchUsers = channel.unary_unary(
+                '/user.UserService/SearchUsers',
+                request_serializer=user__pb2.SearchRequest.SerializeToString,
+                response_deserializer=user__pb2.UserListResponse.FromString,
+                _registered_method=True)
+        self.ListUsersSince = channel.unary_unary(
+                '/user.UserService/ListUsersSince',
+                request_serializer=user__pb2.ListUsersSinceRequest.SerializeToString,
+                response_deserializer=user__pb2.UserChangesResponse.FromString,
+                _registered_method=True)
+        self.WatchUsers = channel.unary_stream(
+                '/user.UserService/WatchUsers',
+                request_serializer=user__pb2.WatchUsersRequest.SerializeToString,
+                response_deserializer=user__pb2.UserEvent.FromString,
+                _registered_method=True)
+        self.UserStats = channel.unary_unary(
+                '/user.UserService/UserStats',
+                request_serializer=user__pb2.UserStatsRequest.SerializeToString,
+                response_deserializer=user__pb2.UserStatsResponse.FromString,
+                _registered_method=True)
 
 
 class UserServiceServicer(object):
@@ -71,7 +116,70 @@ class UserServiceServicer(object):
         raise NotImplementedError('Method not implemented!')
 
     def ListUsers(self, request, context):
-        """List all users
+        """List users in ID order, one page at a time when page_size is set
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamUsers(self, request, context):
+        """Stream users in ID order
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetUsers(self, request, context):
+        """Get several users by ID in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchCreateUsers(self, request, context):
+        """Create several users in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetUserByEmail(self, request, context):
+        """Get a user by email (exact, case-insensitive)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def QueryUsersByAge(self, request, context):
+        """List users whose age is within [min_age, max_age], ordered by age
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchUsers(self, request, context):
+        """Typeahead search: users whose name words or email start with prefix
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListUsersSince(self, request, context):
+        """Delta sync: users created or changed after since_seq
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchUsers(self, request, context):
+        """Push feed of user changes, for keeping downstream caches current
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UserStats(self, request, context):
+        """Aggregate statistics over all users (age distribution, creations over time)
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
@@ -92,9 +200,54 @@ def add_UserServiceServicer_to_server(servicer, server):
             ),
             'ListUsers': grpc.unary_unary_rpc_method_handler(
                     servicer.ListUsers,
-                    request_deserializer=user__pb2.Empty.FromString,
+                    request_deserializer=user__pb2.ListUsersRequest.FromString,
                     response_serializer=user__pb2.UserListResponse.SerializeToString,
             ),
+            'StreamUsers': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamUsers,
+                    request_deserializer=user__pb2.ListUsersRequest.FromString,
+                    response_serializer=user__pb2.UserResponse.SerializeToString,
+            ),
+            'BatchGetUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetUsers,
+                    request_deserializer=user__pb2.BatchGetUsersRequest.FromString,
+                    response_serializer=user__pb2.BatchGetUsersResponse.SerializeToString,
+            ),
+            'BatchCreateUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchCreateUsers,
+                    request_deserializer=user__pb2.BatchCreateUsersRequest.FromString,
+                    response_serializer=user__pb2.UserListResponse.SerializeToString,
+            ),
+            'GetUserByEmail': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetUserByEmail,
+                    request_deserializer=user__pb2.EmailRequest.FromString,
+                    response_serializer=user__pb2.UserResponse.SerializeToString,
+            ),
+            'QueryUsersByAge': grpc.unary_unary_rpc_method_handler(
+                    servicer.QueryUsersByAge,
+                    request_deserializer=user__pb2.AgeRangeRequest.FromString,
+                    response_serializer=user__pb2.UserListResponse.SerializeToString,
+            ),
+            'SearchUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchUsers,
+                    request_deserializer=user__pb2.SearchRequest.FromString,
+                    response_serializer=user__pb2.UserListResponse.SerializeToString,
+            ),
+            'ListUsersSince': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListUsersSince,
+                    request_deserializer=user__pb2.ListUsersSinceRequest.FromString,
+                    response_serializer=user__pb2.UserChangesResponse.SerializeToString,
+            ),
+            'WatchUsers': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchUsers,
+                    request_deserializer=user__pb2.WatchUsersRequest.FromString,
+                    response_serializer=user__pb2.UserEvent.SerializeToString,
+            ),
+            'UserStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.UserStats,
+                    request_deserializer=user__pb2.UserStatsRequest.FromString,
+                    response_serializer=user__pb2.UserStatsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'user.UserService', rpc_method_handlers)
@@ -176,7 +329,7 @@ class UserService(object):
             request,
             target,
             '/user.UserService/ListUsers',
-            user__pb2.Empty.SerializeToString,
+            user__pb2.ListUsersRequest.SerializeToString,
             user__pb2.UserListResponse.FromString,
             options,
             channel_credentials,
@@ -187,3 +340,246 @@ class UserService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/user.UserService/StreamUsers',
+            user__pb2.ListUsersRequest.SerializeToString,
+            user__pb2.UserResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/BatchGetUsers',
+            user__pb2.BatchGetUsersRequest.SerializeToString,
+            user__pb2.BatchGetUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchCreateUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/BatchCreateUsers',
+            user__pb2.BatchCreateUsersRequest.SerializeToString,
+            user__pb2.UserListResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetUserByEmail(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/GetUserByEmail',
+            user__pb2.EmailRequest.SerializeToString,
+            user__pb2.UserResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def QueryUsersByAge(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/QueryUsersByAge',
+            user__pb2.AgeRangeRequest.SerializeToString,
+            user__pb2.UserListResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/SearchUsers',
+            user__pb2.SearchRequest.SerializeToString,
+            user__pb2.UserListResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListUsersSince(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/ListUsersSince',
+            user__pb2.ListUsersSinceRequest.SerializeToString,
+            user__pb2.UserChangesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/user.UserService/WatchUsers',
+            user__pb2.WatchUsersRequest.SerializeToString,
+            user__pb2.UserEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def UserStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/UserStats',
+            user__pb2.UserStatsRequest.SerializeToString,
+            user__pb2.UserStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,204 @@
+"""
+Cross-process user storage for Service A's pre-fork mode
+Users live in fixed-width records inside an anonymous shared mmap that is
+created before the workers fork, so a user created through one worker is
+immediately readable from every other worker.
+"""
+import mmap
+import multiprocessing
+import struct
+import threading
+from datetime import datetime
+
+from user_codec import encode_user
+from user_store import UserIndexes, version_epoch
+
+DEFAULT_CAPACITY = 100000
+
+MAX_NAME_BYTES = 100
+MAX_EMAIL_BYTES = 100
+
+# Header: number of published records. A record is fully written before the
+# count is bumped, so readers never see a half-written row.
+HEADER = struct.Struct('<Q')
+# Record: user_id, age, created_at (ISO), name, email (UTF-8, NUL padded)
+RECORD = struct.Struct(f'<ii32s{MAX_NAME_BYTES}s{MAX_EMAIL_BYTES}s')
+
+
+class StoreFullError(Exception):
+    """Raised when the shared store has no free record slots"""
+
+
+def encode_fields(name, email):
+    """UTF-8 name and email, or ValueError if either is too long for a fixed-width record"""
+    name_bytes = name.encode('utf-8')
+    email_bytes = email.encode('utf-8')
+    if len(name_bytes) > MAX_NAME_BYTES:
+        raise ValueError(f'name is longer than {MAX_NAME_BYTES} bytes')
+    if len(email_bytes) > MAX_EMAIL_BYTES:
+        raise ValueError(f'email is longer than {MAX_EMAIL_BYTES} bytes')
+    return name_bytes, email_bytes
+
+
+class SharedUserStore:
+    """Append-only user table in shared memory, usable across forked workers
+
+    Same interface as user_store.UserStore. User IDs are the 1-based record
+    slot, allocated under a process-shared lock; reads take no lock.
+    Secondary indexes are kept per process and catch up with rows
+    published by other workers before each indexed lookup. Serialized
+    UserResponse bytes are cached per process on first read; rows are
+    never rewritten, so cached bytes never go stale.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        # Anonymous mappings are MAP_SHARED, so forked children see writes
+        self._buf = mmap.mmap(-1, HEADER.size + capacity * RECORD.size)
+        self._lock = multiprocessing.get_context('fork').Lock()
+        self._index_lock = threading.Lock()
+        self._indexes = UserIndexes()
+        self._indexed = 0
+        self._encoded = {}
+        self._version_epoch = version_epoch()
+
+    def __len__(self):
+        return HEADER.unpack_from(self._buf, 0)[0]
+
+    @property
+    def version(self):
+        """Monotonic counter bumped by every stored change (rows are append-only)"""
+        return self._version_epoch + len(self)
+
+    def create(self, name, email, age):
+        """Store a new user and return its record"""
+        return self.create_many([(name, email, age)])[0]
+
+    def create_many(self, users):
+        """Store several (name, email, age) users and return their records
+
+        All users are validated first, then written under one lock
+        acquisition and published together.
+        """
+        users = list(users)
+        encoded = [encode_fields(name, email) for name, email, _ in users]
+        created_at = datetime.now().isoformat()
+
+        with self._lock:
+            count = len(self)
+            if count + len(users) > self.capacity:
+                raise StoreFullError(f'User store is full ({self.capacity} users)')
+            self._catch_up()
+            with self._index_lock:
+                self._indexes.check(users)
+            for index, ((_, _, age), (name_bytes, email_bytes)) in enumerate(zip(users, encoded)):
+                RECORD.pack_into(
+                    self._buf, HEADER.size + (count + index) * RECORD.size,
+                    count + index + 1, age, created_at.encode('ascii'), name_bytes, email_bytes
+                )
+            HEADER.pack_into(self._buf, 0, count + len(users))
+
+        return [
+            {
+                "user_id": count + index + 1,
+                "name": name,
+                "email": email,
+                "age": age,
+                "created_at": created_at,
+                "seq": self._version_epoch + count + index + 1
+            }
+            for index, (name, email, age) in enumerate(users)
+        ]
+
+    def _read(self, index):
+        user_id, age, created_at, name, email = RECORD.unpack_from(
+            self._buf, HEADER.size + index * RECORD.size
+        )
+        return {
+            "user_id": user_id,
+            "name": name.rstrip(b'\0').decode('utf-8'),
+            "email": email.rstrip(b'\0').decode('utf-8'),
+            "age": age,
+            "created_at": created_at.rstrip(b'\0').decode('ascii'),
+            "seq": self._version_epoch + user_id
+        }
+
+    def get(self, user_id):
+        """Return the user record, or None if it does not exist"""
+        if 1 <= user_id <= len(self):
+            return self._read(user_id - 1)
+        return None
+
+    def _catch_up(self):
+        """Index the rows other processes published since the last call"""
+        count = len(self)
+        if self._indexed >= count:
+            return
+        with self._index_lock:
+            for index in range(self._indexed, count):
+                self._indexes.add(self._read(index))
+            self._indexed = max(self._indexed, count)
+
+    def changes_since(self, since_seq):
+        """Users changed after since_seq, oldest change first
+
+        Returns (users, seq, full_snapshot). Rows are append-only and row N
+        has seq epoch + N, so the whole log is always available; only a
+        seq from before this store existed needs a full snapshot.
+        """
+        count = len(self)
+        seq = self._version_epoch + count
+        if since_seq >= seq:
+            return [], seq, False
+        if since_seq < self._version_epoch:
+            return [self._read(index) for index in range(count)], seq, True
+        return [self._read(index) for index in range(since_seq - self._version_epoch, count)], seq, False
+
+    def get_by_email(self, email):
+        """Return the user registered with email, or None"""
+        self._catch_up()
+        user_id = self._indexes.email_id(email)
+        return None if user_id is None else self.get(user_id)
+
+    def query_by_age(self, min_age, max_age, limit):
+        """Return up to `limit` users with min_age <= age <= max_age, ordered by age"""
+        self._catch_up()
+        with self._index_lock:
+            user_ids = self._indexes.age_range(min_age, max_age, limit)
+        return self.get_many(user_ids)
+
+    def search(self, prefix, limit):
+        """Return up to `limit` users whose name words or email start with prefix"""
+        self._catch_up()
+        with self._index_lock:
+            user_ids = self._indexes.prefix_search(prefix, limit)
+        return self.get_many(user_ids)
+
+    def get_many(self, user_ids):
+        """Return the record (or None) for each ID, in the same order"""
+        count = len(self)
+        return [self._read(user_id - 1) if 1 <= user_id <= count else None for user_id in user_ids]
+
+    def iter_users(self, after_id=0):
+        """Yield user records with IDs above after_id, in ID order"""
+        for index in range(max(after_id, 0), len(self)):
+            yield self._read(index)
+
+    def get_encoded(self, user_id):
+        """Return the user's serialized UserResponse, or None"""
+        user_bytes = self._encoded.get(user_id)
+        if user_bytes is None:
+            user = self.get(user_id)
+            if user is None:
+                return None
+            user_bytes = self._encoded[user_id] = encode_user(user)
+        return user_bytes
+
+    def iter_encoded(self, after_id=0):
+        """Yield (user_id, UserResponse bytes) for IDs above after_id, in ID order"""
+        for user_id in range(max(after_id, 0) + 1, len(self) + 1):
+            yield user_id, self.get_encoded(user_id)
+
+    def snapshot(self):
+        """Return every user record ordered by user ID"""
+        return list(self.iter_users())
@@ -0,0 +1,66 @@
+"""
+Tests for user_stats request checks
+Run from service_a: python -m unittest test_user_stats (or pytest)
+"""
+import os
+import sys
+import unittest
+
+import grpc
+
+# Add the proto directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+
+import user_pb2
+from grpc_server import UserServiceServicer
+from user_stats import MAX_CREATED_BUCKET_SECONDS, check_request
+from user_store import UserStore, add_sample_users
+
+
+class _Context:
+    """Records the status a unary handler sets"""
+
+    def __init__(self):
+        self.code = grpc.StatusCode.OK
+        self.details = ''
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+class CreatedBucketSecondsTest(unittest.TestCase):
+
+    def setUp(self):
+        store = UserStore()
+        add_sample_users(store)
+        self.servicer = UserServiceServicer(store)
+
+    def user_stats(self, created_bucket_seconds):
+        context = _Context()
+        response = self.servicer.UserStats(
+            user_pb2.UserStatsRequest(created_bucket_seconds=created_bucket_seconds), context
+        )
+        return response, context
+
+    def test_check_request_rejects_too_wide_buckets(self):
+        check_request((), (), MAX_CREATED_BUCKET_SECONDS)
+        with self.assertRaises(ValueError):
+            check_request((), (), MAX_CREATED_BUCKET_SECONDS + 1)
+
+    def test_overflowing_bucket_is_invalid_argument(self):
+        for seconds in (10 ** 13, 2 ** 63 - 1):
+            _, context = self.user_stats(seconds)
+            self.assertEqual(context.code, grpc.StatusCode.INVALID_ARGUMENT)
+            self.assertIn('created_bucket_seconds', context.details)
+
+    def test_widest_bucket_holds_every_user(self):
+        response, context = self.user_stats(MAX_CREATED_BUCKET_SECONDS)
+        self.assertEqual(context.code, grpc.StatusCode.OK)
+        self.assertEqual([bucket.count for bucket in response.created], [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Protobuf encoding helpers for Service A's pre-serialized responses
+Users are encoded to UserResponse bytes once, when they are written, and
+responses are assembled from those bytes without building messages
+"""
+import sys
+import os
+
+# Add the proto directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+
+import user_pb2
+
+# Wire tags (field_number << 3 | wire_type) in UserListResponse
+_USERS_TAG = b'\x0a'
+_NEXT_PAGE_TOKEN_TAG = b'\x12'
+_VERSION_TAG = b'\x18'
+
+
+def encode_user(user):
+    """Serialize a user record as UserResponse bytes"""
+    return user_pb2.UserResponse(
+        user_id=user["user_id"],
+        name=user["name"],
+        email=user["email"],
+        age=user["age"],
+        created_at=user["created_at"]
+    ).SerializeToString()
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _length_delimited(tag, payload):
+    return tag + _varint(len(payload)) + payload
+
+
+def encode_user_list(encoded_users, next_page_token='', version=0):
+    """Assemble UserListResponse bytes from already-encoded UserResponse bytes"""
+    parts = [_length_delimited(_USERS_TAG, encoded) for encoded in encoded_users]
+    if next_page_token:
+        parts.append(_length_delimited(_NEXT_PAGE_TOKEN_TAG, next_page_token.encode('utf-8')))
+    if version:
+        parts.append(_VERSION_TAG + _varint(version))
+    return b''.join(parts)
+
+
+def encode_not_modified(version):
+    """UserListResponse bytes telling the caller its copy at `version` is current"""
+    return user_pb2.UserListResponse(version=version, not_modified=True).SerializeToString()
@@ -0,0 +1,156 @@
+"""
+Aggregate user statistics for Service A
+Ages and creation times are pulled out of the store as column arrays once
+per store version; every statistic is then a vectorized NumPy pass over
+them, and results are kept until the store changes.
+"""
+import threading
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+from columnar_store import to_micros, from_micros
+
+# Histogram bucket lower bounds used when the request gives none
+DEFAULT_AGE_BUCKETS = (0, 18, 25, 35, 45, 55, 65)
+DEFAULT_PERCENTILES = (50, 90, 99)
+DEFAULT_CREATED_BUCKET_SECONDS = 86400
+
+# Request limits
+MAX_AGE_BUCKETS = 100
+MAX_PERCENTILES = 20
+MAX_CREATED_BUCKETS = 10000
+# 100 years; wider buckets would overflow int64 once converted to µs
+MAX_CREATED_BUCKET_SECONDS = 100 * 366 * 86400
+
+# Results kept per store version, one per distinct request
+MAX_CACHED_RESULTS = 64
+
+
+def store_columns(store):
+    """(ages, created_at as epoch µs) of every user, as array('i') and array('q')
+
+    Uses the store's own columns() when it keeps users in columns, and
+    reads every user record otherwise.
+    """
+    columns = getattr(store, 'columns', None)
+    if columns is not None:
+        return columns()
+
+    ages, created = array('i'), array('q')
+    # Users created by one call share a created_at string
+    parsed = {}
+    for user in store.iter_users():
+        micros = parsed.get(user["created_at"])
+        if micros is None:
+            micros = parsed[user["created_at"]] = to_micros(datetime.fromisoformat(user["created_at"]))
+        ages.append(user["age"])
+        created.append(micros)
+    return ages, created
+
+
+def check_request(age_buckets, percentiles, created_bucket_seconds):
+    """Raise ValueError for parameters compute_stats() does not accept"""
+    if len(age_buckets) > MAX_AGE_BUCKETS:
+        raise ValueError(f'At most {MAX_AGE_BUCKETS} age buckets')
+    if any(low >= high for low, high in zip(age_buckets, age_buckets[1:])):
+        raise ValueError('age_buckets must be strictly increasing')
+    if len(percentiles) > MAX_PERCENTILES:
+        raise ValueError(f'At most {MAX_PERCENTILES} percentiles')
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError('percentiles must be between 0 and 100')
+    if created_bucket_seconds < 0:
+        raise ValueError('created_bucket_seconds must not be negative')
+    if created_bucket_seconds > MAX_CREATED_BUCKET_SECONDS:
+        raise ValueError(f'created_bucket_seconds must be at most {MAX_CREATED_BUCKET_SECONDS}')
+
+
+def compute_stats(ages, created, age_buckets, percentiles, created_bucket_seconds):
+    """Statistics over NumPy age and created_at (epoch µs) columns, as a dict"""
+    count = len(ages)
+    # Bucket 0 counts ages below the first edge, bucket i ages in
+    # [edge i-1, edge i), the last one ages from the last edge up
+    edges = np.asarray(age_buckets, dtype=np.int64)
+    counts = np.bincount(np.searchsorted(edges, ages, side='right'), minlength=len(edges) + 1)
+    histogram = [
+        {
+            "min_age": int(edges[i]),
+            "max_age": int(edges[i + 1]) if i + 1 < len(edges) else None,
+            "count": int(counts[i + 1])
+        }
+        for i in range(len(edges))
+    ]
+
+    bucket_micros = created_bucket_seconds * 1000000
+    starts, created_counts = np.unique(created // bucket_micros, return_counts=True)
+    if len(starts) > MAX_CREATED_BUCKETS:
+        raise ValueError(
+            f'{len(starts)} creation-time buckets (at most {MAX_CREATED_BUCKETS}); '
+            'use a larger created_bucket_seconds'
+        )
+
+    ages_at = np.percentile(ages, percentiles) if count else [0.0] * len(percentiles)
+    return {
+        "count": count,
+        "min_age": int(ages.min()) if count else 0,
+        "max_age": int(ages.max()) if count else 0,
+        "mean_age": float(ages.mean()) if count else 0.0,
+        "age_percentiles": [
+            {"percentile": float(p), "age": float(age)}
+            for p, age in zip(percentiles, ages_at)
+        ],
+        "age_histogram": histogram,
+        "ages_below_buckets": int(counts[0]) if len(edges) else 0,
+        "created": [
+            {"start": from_micros(int(start) * bucket_micros), "count": int(n)}
+            for start, n in zip(starts, created_counts)
+        ],
+    }
+
+
+class UserStatsCache:
+    """Statistics for a store, recomputed only after the store changes
+
+    Holds the columns read at the latest version and the results computed
+    from them. One lock serializes the work, so concurrent requests on a
+    cold cache read the store once.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._columns = None
+        self._results = {}
+
+    def get(self, age_buckets=(), percentiles=(), created_bucket_seconds=0):
+        """Return (version, stats dict); empty parameters take the defaults
+
+        Raises ValueError for invalid parameters.
+        """
+        age_buckets = tuple(age_buckets) or DEFAULT_AGE_BUCKETS
+        percentiles = tuple(percentiles) or DEFAULT_PERCENTILES
+        created_bucket_seconds = created_bucket_seconds or DEFAULT_CREATED_BUCKET_SECONDS
+        check_request(age_buckets, percentiles, created_bucket_seconds)
+        key = (age_buckets, percentiles, created_bucket_seconds)
+
+        with self._lock:
+            # Read the version before the columns, so it never claims newer data
+            version = self.store.version
+            if version != self._version:
+                ages, created = store_columns(self.store)
+                self._columns = (
+                    np.frombuffer(ages, dtype=np.int32) if len(ages) else np.zeros(0, np.int32),
+                    np.frombuffer(created, dtype=np.int64) if len(created) else np.zeros(0, np.int64),
+                )
+                self._version = version
+                self._results = {}
+
+            stats = self._results.get(key)
+            if stats is None:
+                stats = compute_stats(*self._columns, *key)
+                if len(self._results) >= MAX_CACHED_RESULTS:
+                    self._results.pop(next(iter(self._results)))
+                self._results[key] = stats
+            return version, stats
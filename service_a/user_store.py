@@ -0,0 +1,397 @@
+"""
+User storage for Service A
+The servicer talks to a store through create/get/snapshot so the
+backing representation can change without touching the RPC handlers
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from user_codec import encode_user
+
+DEFAULT_SHARDS = 16
+
+# Changes remembered for delta sync before callers fall back to a snapshot
+DEFAULT_CHANGELOG_SIZE = 10000
+
+# Batches at least this large are indexed by appending and re-sorting
+# instead of one insort per user
+BULK_INDEX_THRESHOLD = 64
+
+
+class DuplicateEmailError(Exception):
+    """Raised when a create would reuse an email that is already taken"""
+
+
+def version_epoch():
+    """Starting version for a new store
+
+    Versions start at the current time in microseconds, so a restarted
+    service never reuses a version a client may still hold from before.
+    """
+    return time.time_ns() // 1000
+
+
+def email_key(email):
+    """Normalised form of an email used for uniqueness and lookups"""
+    return email.lower()
+
+
+def prefix_keys(user):
+    """Search keys for a user: each word of the name, and the email"""
+    keys = set(user["name"].lower().split())
+    if user["email"]:
+        keys.add(email_key(user["email"]))
+    return keys
+
+
+class UserIndexes:
+    """Secondary indexes over the user table
+
+    A unique hash index on email, an (age, user_id) sorted list for range
+    queries and a (key, user_id) sorted list of name words and emails for
+    prefix search. Not thread-safe on its own; the owning store serialises
+    access to it.
+    """
+
+    def __init__(self):
+        self.by_email = {}
+        self.by_age = []
+        self.by_prefix = []
+
+    def check(self, users):
+        """Raise DuplicateEmailError if any (name, email, age) would clash"""
+        seen = set()
+        for _, email, _ in users:
+            if not email:
+                continue
+            key = email_key(email)
+            if key in self.by_email or key in seen:
+                raise DuplicateEmailError(f'Email {email} is already in use')
+            seen.add(key)
+
+    def add(self, user):
+        if user["email"]:
+            self.by_email[email_key(user["email"])] = user["user_id"]
+        bisect.insort(self.by_age, (user["age"], user["user_id"]))
+        for key in prefix_keys(user):
+            bisect.insort(self.by_prefix, (key, user["user_id"]))
+    
+    def add_many(self, users):
+        """Index many users at once (one sort instead of an insort per user)"""
+        if isinstance(users, list) and len(users) < BULK_INDEX_THRESHOLD:
+            for user in users:
+                self.add(user)
+            return
+        for user in users:
+            if user["email"]:
+                self.by_email[email_key(user["email"])] = user["user_id"]
+            self.by_age.append((user["age"], user["user_id"]))
+            self.by_prefix.extend((key, user["user_id"]) for key in prefix_keys(user))
+        self.by_age.sort()
+        self.by_prefix.sort()
+
+    def email_id(self, email):
+        """User ID registered for email, or None"""
+        return self.by_email.get(email_key(email))
+
+    def age_range(self, min_age, max_age, limit):
+        """IDs of up to `limit` users with min_age <= age <= max_age, by age"""
+        start = bisect.bisect_left(self.by_age, (min_age,))
+        end = bisect.bisect_right(self.by_age, (max_age, float('inf')))
+        return [user_id for _, user_id in self.by_age[start:min(end, start + limit)]]
+
+    def prefix_search(self, prefix, limit):
+        """IDs of up to `limit` users with a name word or email starting with prefix"""
+        prefix = prefix.lower()
+        user_ids = []
+        index = bisect.bisect_left(self.by_prefix, (prefix,))
+        while index < len(self.by_prefix) and len(user_ids) < limit:
+            key, user_id = self.by_prefix[index]
+            if not key.startswith(prefix):
+                break
+            if user_id not in user_ids:
+                user_ids.append(user_id)
+            index += 1
+        return user_ids
+
+
+class _Shard:
+    """One stripe of the user table and the lock that guards its writes
+
+    `encoded` caches each user's serialized UserResponse; it is replaced
+    together with the record whenever the record is written.
+    """
+
+    __slots__ = ('lock', 'users', 'encoded')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = {}
+        self.encoded = {}
+
+
+class UserStore:
+    """Thread-safe in-memory user table keyed by user ID
+
+    IDs come from a dedicated allocator, so concurrent creates never share
+    an ID. Records are striped over shards (user_id % shards), each with its
+    own write lock. Writes also hold the index lock while they check and
+    update the secondary indexes. Primary-key and email reads take no
+    lock: records are never mutated after insertion and single dict
+    operations are atomic, so readers always see whole records.
+
+    Iteration stops at the highest ID whose record is already in the
+    shards (the published ID), not the highest allocated one, so a reader
+    never steps past IDs of a batch that is still being inserted.
+
+    Every write gets the next change sequence number ("seq", also the
+    store version) and is remembered in a bounded changelog for
+    changes_since().
+
+    A read-only base (e.g. a mapped_store.MappedSnapshot) can hold the
+    users that are not in the shards; they are read from it on demand.
+    Its users are not indexed until build_indexes() has run, and writes
+    and indexed lookups wait for that.
+    """
+
+    def __init__(self, shards=DEFAULT_SHARDS, changelog_size=DEFAULT_CHANGELOG_SIZE, base=None):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._id_lock = threading.Lock()
+        self._last_user_id = 0
+        # Highest ID that iteration may reach; written under the index lock
+        self._published_id = 0
+        self._index_lock = threading.Lock()
+        self._indexes = UserIndexes()
+        self._version = version_epoch()
+        # (seq, user_id) of the most recent changes, oldest first
+        self._changelog = deque(maxlen=changelog_size)
+        self._base = base
+        self._indexed = threading.Event()
+        if base is None:
+            self._indexed.set()
+        else:
+            self._last_user_id = self._published_id = base.max_user_id
+            self._version = max(self._version, base.seq)
+
+    def __len__(self):
+        count = sum(len(shard.users) for shard in self._shards)
+        return count + len(self._base) if self._base is not None else count
+
+    def build_indexes(self):
+        """Index the base's users; slow for a large base, so run it in the background"""
+        if self._base is not None:
+            with self._index_lock:
+                self._indexes.add_many(self._base.iter_users())
+        self._indexed.set()
+
+    def indexes_ready(self):
+        """Whether build_indexes() has finished, so writes and indexed lookups no longer wait"""
+        return self._indexed.is_set()
+
+    def rebase(self, base):
+        """Switch to a newer base and drop the in-memory copies of the users it holds
+
+        base must hold every user with an ID up to its max_user_id.
+        """
+        with self._index_lock:
+            self._base = base
+            for shard in self._shards:
+                with shard.lock:
+                    for user_id in [user_id for user_id in shard.users if user_id <= base.max_user_id]:
+                        del shard.users[user_id]
+                        shard.encoded.pop(user_id, None)
+
+    @property
+    def version(self):
+        """Monotonic counter bumped by every stored change"""
+        return self._version
+
+    def _allocate_ids(self, count):
+        with self._id_lock:
+            first = self._last_user_id + 1
+            self._last_user_id += count
+            return range(first, first + count)
+
+    def _shard(self, user_id):
+        return self._shards[user_id % len(self._shards)]
+
+    def create(self, name, email, age):
+        """Store a new user and return its record"""
+        return self.create_many([(name, email, age)])[0]
+
+    def create_many(self, users):
+        """Store several (name, email, age) users and return their records
+
+        All or nothing: raises DuplicateEmailError without storing anything
+        if any email is taken. Allocates one block of IDs and takes each
+        shard lock once.
+        """
+        users = list(users)
+        created_at = datetime.now().isoformat()
+
+        self._indexed.wait()
+        with self._index_lock:
+            self._indexes.check(users)
+            records = [
+                {
+                    "user_id": user_id,
+                    "name": name,
+                    "email": email,
+                    "age": age,
+                    "created_at": created_at,
+                    "seq": self._version + offset
+                }
+                for offset, (user_id, (name, email, age)) in enumerate(
+                    zip(self._allocate_ids(len(users)), users), start=1
+                )
+            ]
+
+            by_shard = {}
+            for user in records:
+                by_shard.setdefault(self._shard(user["user_id"]), []).append(user)
+            for shard, shard_users in by_shard.items():
+                encoded = [encode_user(user) for user in shard_users]
+                with shard.lock:
+                    for user, user_bytes in zip(shard_users, encoded):
+                        shard.encoded[user["user_id"]] = user_bytes
+                        shard.users[user["user_id"]] = user
+            if records:
+                # IDs are allocated under the index lock, so this batch
+                # holds the highest IDs so far and they are all stored now
+                self._published_id = records[-1]["user_id"]
+
+            self._indexes.add_many(records)
+            for user in records:
+                self._changelog.append((user["seq"], user["user_id"]))
+            self._version += len(records)
+        return records
+
+    def load(self, records, encoded=None):
+        """Insert existing records (e.g. recovered from disk) keeping their IDs and seqs
+
+        encoded optionally holds each record's UserResponse bytes, in the
+        same order. Meant for an empty store at startup.
+        """
+        records = list(records)
+        if encoded is None:
+            encoded = [encode_user(user) for user in records]
+        with self._index_lock:
+            for user, user_bytes in zip(records, encoded):
+                shard = self._shard(user["user_id"])
+                with shard.lock:
+                    shard.encoded[user["user_id"]] = user_bytes
+                    shard.users[user["user_id"]] = user
+            self._indexes.add_many(records)
+            for user in sorted(records, key=lambda user: user["seq"]):
+                self._changelog.append((user["seq"], user["user_id"]))
+            with self._id_lock:
+                self._last_user_id = max([self._last_user_id] + [user["user_id"] for user in records])
+                self._published_id = self._last_user_id
+            self._version = max([self._version] + [user["seq"] for user in records])
+    
+    def changes_since(self, since_seq):
+        """Users changed after since_seq, oldest change first
+
+        Returns (users, seq, full_snapshot). When since_seq is older than
+        the changelog remembers, users is every user and full_snapshot is
+        True. Pass the returned seq as since_seq next time.
+        """
+        with self._index_lock:
+            seq = self._version
+            if since_seq >= seq:
+                return [], seq, False
+            if not self._changelog or self._changelog[0][0] > since_seq + 1:
+                overrun = True
+            else:
+                overrun = False
+                changed = []
+                for change_seq, user_id in reversed(self._changelog):
+                    if change_seq <= since_seq:
+                        break
+                    changed.append(user_id)
+
+        if overrun:
+            # seq was read before the rows, so the snapshot is at least that new
+            return self.snapshot(), seq, True
+        return self.get_many(reversed(list(dict.fromkeys(changed)))), seq, False
+
+    def get(self, user_id):
+        """Return the user record, or None if it does not exist"""
+        user = self._shard(user_id).users.get(user_id)
+        if user is None and self._base is not None:
+            return self._base.get(user_id)
+        return user
+
+    def get_many(self, user_ids):
+        """Return the record (or None) for each ID, in the same order"""
+        if self._base is not None:
+            return [self.get(user_id) for user_id in user_ids]
+        return [self._shard(user_id).users.get(user_id) for user_id in user_ids]
+
+    def get_by_email(self, email):
+        """Return the user registered with email, or None"""
+        self._indexed.wait()
+        user_id = self._indexes.email_id(email)
+        return None if user_id is None else self.get(user_id)
+
+    def query_by_age(self, min_age, max_age, limit):
+        """Return up to `limit` users with min_age <= age <= max_age, ordered by age"""
+        self._indexed.wait()
+        with self._index_lock:
+            user_ids = self._indexes.age_range(min_age, max_age, limit)
+        return self.get_many(user_ids)
+
+    def search(self, prefix, limit):
+        """Return up to `limit` users whose name words or email start with prefix"""
+        self._indexed.wait()
+        with self._index_lock:
+            user_ids = self._indexes.prefix_search(prefix, limit)
+        return self.get_many(user_ids)
+
+    def iter_users(self, after_id=0):
+        """Yield user records with IDs above after_id, in ID order
+
+        Walks the published ID range one lookup at a time, so memory use
+        does not grow with the table.
+        """
+        for user_id in range(after_id + 1, self._published_id + 1):
+            user = self._shard(user_id).users.get(user_id)
+            if user is None and self._base is not None:
+                user = self._base.get(user_id)
+            if user is not None:
+                yield user
+
+    def get_encoded(self, user_id):
+        """Return the user's serialized UserResponse, or None"""
+        user_bytes = self._shard(user_id).encoded.get(user_id)
+        if user_bytes is None and self._base is not None:
+            return self._base.get_encoded(user_id)
+        return user_bytes
+
+    def iter_encoded(self, after_id=0):
+        """Yield (user_id, UserResponse bytes) for IDs above after_id, in ID order"""
+        for user_id in range(after_id + 1, self._published_id + 1):
+            user_bytes = self._shard(user_id).encoded.get(user_id)
+            if user_bytes is None and self._base is not None:
+                user_bytes = self._base.get_encoded(user_id)
+            if user_bytes is not None:
+                yield user_id, user_bytes
+
+    def snapshot(self):
+        """Return every user record ordered by user ID"""
+        return list(self.iter_users())
+
+
+def add_sample_users(store):
+    """Add sample users for testing"""
+    sample_users = [
+        {"name": "John Doe", "email": "john@example.com", "age": 30},
+        {"name": "Jane Smith", "email": "jane@example.com", "age": 25},
+        {"name": "Bob Johnson", "email": "bob@example.com", "age": 35},
+    ]
+
+    for user_data in sample_users:
+        store.create(user_data["name"], user_data["email"], user_data["age"])
@@ -2,21 +2,55 @@
 Service A - Web Interface (Port 8001)
 FastAPI web UI for User Service
 """
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager, nullcontext
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import grpc
+import json
 import sys
 import os
 
-# Add proto directory to path
+# Add proto and shared directories to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
 
 import user_pb2
 import user_pb2_grpc
+from channel_pool import ChannelPool, DEFAULT_TIMEOUT, STREAM_TIMEOUT
+from etag import make_etag, parse_etag
+from singleflight import SingleFlight
+from metrics import REGISTRY, CONTENT_TYPE, ClientMetricsInterceptor, MetricsMiddleware
 
-app = FastAPI(title="Service A - User Service", version="1.0.0")
+USER_SERVICE_TARGET = os.environ.get('USER_SERVICE_TARGET', 'localhost:50051')
+
+# Shared gRPC channels, opened on startup and closed on shutdown
+channels = None
+
+# (store version, JSON body) of the last full /api/users response
+users_cache = None
+
+# Concurrent identical upstream reads share one in-flight RPC
+inflight = SingleFlight()
+
+# In-process UserService stub, set by main.py when the gRPC server runs in
+# this process; None = call USER_SERVICE_TARGET over gRPC
+local_stub = None
+
+def use_local_stub(stub):
+    """Send gateway calls to an in-process stub instead of USER_SERVICE_TARGET"""
+    global local_stub
+    local_stub = stub
+
+@asynccontextmanager
+async def lifespan(app):
+    global channels
+    channels = ChannelPool(interceptors=[ClientMetricsInterceptor()])
+    yield
+    await channels.close()
+    channels = None
+
+app = FastAPI(title="Service A - User Service", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,14 +60,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route, served at /metrics
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 class CreateUserRequest(BaseModel):
     name: str
     email: str
     age: int
 
+class BatchGetUsersRequest(BaseModel):
+    user_ids: list[int]
+
+class BatchCreateUsersRequest(BaseModel):
+    users: list[CreateUserRequest]
+
 def get_user_service_stub():
-    channel = grpc.insecure_channel('localhost:50051')
-    return user_pb2_grpc.UserServiceStub(channel)
+    """Borrow a UserService stub: the in-process one if set, else grpc.aio from the shared channel pool"""
+    if local_stub is not None:
+        return nullcontext(local_stub)
+    return channels.stub(USER_SERVICE_TARGET, user_pb2_grpc.UserServiceStub)
+
+def user_to_dict(user):
+    """Convert a UserResponse message to a JSON-ready dict"""
+    return {
+        "user_id": user.user_id,
+        "name": user.name,
+        "email": user.email,
+        "age": user.age,
+        "created_at": user.created_at
+    }
 
 @app.get("/", response_class=HTMLResponse)
 async def home():
@@ -149,6 +204,12 @@ async def home():
                 <button onclick="getUser()">🔍 ค้นหา</button>
                 <div id="getUserResult" class="result" style="display:none;"></div>
             </div>
+            
+            <div class="card">
+                <h2>🔎 ค้นหา User ตามชื่อ/อีเมล</h2>
+                <input type="text" id="searchQuery" placeholder="พิมพ์ชื่อหรืออีเมล..." oninput="searchUsers()">
+                <div id="searchResult" class="result" style="display:none;"></div>
+            </div>
         </div>
         
         <script>
@@ -237,6 +298,50 @@ async def home():
                     alert('Error: User not found');
                 }
             }
+            
+            let searchTimer = null;
+            let searchSeq = 0;
+            
+            function searchUsers() {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(runSearch, 150);
+            }
+            
+            async function runSearch() {
+                const q = document.getElementById('searchQuery').value.trim();
+                const div = document.getElementById('searchResult');
+                if (!q) {
+                    div.style.display = 'none';
+                    return;
+                }
+                
+                // Ignore responses that arrive after a newer keystroke
+                const seq = ++searchSeq;
+                try {
+                    const response = await fetch(`/api/users/search?q=${encodeURIComponent(q)}`);
+                    const data = await response.json();
+                    if (seq !== searchSeq) return;
+                    
+                    let html = '';
+                    if (data.users && data.users.length > 0) {
+                        data.users.forEach(user => {
+                            html += `
+                                <div class="user-item">
+                                    <strong>👤 ${user.name}</strong><br>
+                                    📧 ${user.email} | 🆔 ID: ${user.user_id}
+                                </div>
+                            `;
+                        });
+                    } else {
+                        html = '<p>ไม่พบ users</p>';
+                    }
+                    div.innerHTML = html;
+                    div.style.display = 'block';
+                } catch (error) {
+                    div.innerHTML = '<p>Error: ' + error.message + '</p>';
+                    div.style.display = 'block';
+                }
+            }
         </script>
     </body>
     </html>
@@ -244,42 +349,118 @@ async def home():
     return html_content
 
 @app.get("/api/users")
-async def list_users():
+async def list_users(request: Request):
     """Get all users"""
+    # Conditional GET: the ETag is the store version. Upstream is asked
+    # with the version we (or the client) already hold, so an unchanged
+    # table costs a tiny not_modified reply instead of a full listing.
+    global users_cache
+    client_version = parse_etag(request.headers.get("if-none-match"))
+    cached = users_cache
     try:
-        stub = get_user_service_stub()
-        request = user_pb2.Empty()
-        response = stub.ListUsers(request)
+        if_version = cached[0] if cached else client_version
         
-        users = []
-        for user in response.users:
-            users.append({
-                "user_id": user.user_id,
-                "name": user.name,
-                "email": user.email,
-                "age": user.age,
-                "created_at": user.created_at
-            })
+        async def fetch():
+            with get_user_service_stub() as stub:
+                return await stub.ListUsers(
+                    user_pb2.ListUsersRequest(if_version=if_version), timeout=DEFAULT_TIMEOUT
+                )
         
-        return {"users": users}
+        response = await inflight.do(('ListUsers', if_version), fetch)
     except Exception as e:
         return {"users": [], "error": str(e)}
+    
+    headers = {"ETag": make_etag(response.version), "Cache-Control": "no-cache"}
+    if client_version and client_version == response.version:
+        return Response(status_code=304, headers=headers)
+    
+    if response.not_modified:
+        body = cached[1]
+    else:
+        body = json.dumps(
+            {"users": [user_to_dict(user) for user in response.users]},
+            ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+        users_cache = (response.version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/users/stream")
+async def stream_users():
+    """Stream all users as NDJSON, one user per line"""
+    async def generate():
+        with get_user_service_stub() as stub:
+            call = stub.StreamUsers(user_pb2.ListUsersRequest(), timeout=STREAM_TIMEOUT)
+            try:
+                async for user in call:
+                    yield json.dumps(user_to_dict(user), ensure_ascii=False, separators=(',', ':')) + '\n'
+            except Exception as e:
+                yield json.dumps({"error": str(e)}, ensure_ascii=False) + '\n'
+            finally:
+                call.cancel()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get("/api/users/search")
+async def search_users(q: str = "", limit: int = 10):
+    """Typeahead search over user names and emails"""
+    if not q.strip():
+        return {"users": []}
+    try:
+        request = user_pb2.SearchRequest(prefix=q, limit=limit)
+        with get_user_service_stub() as stub:
+            response = await stub.SearchUsers(request, timeout=DEFAULT_TIMEOUT)
+        
+        return {"users": [user_to_dict(user) for user in response.users]}
+    except Exception as e:
+        return {"users": [], "error": str(e)}
+
+@app.get("/api/users/stats")
+async def user_stats(age_buckets: str = "", percentiles: str = "", bucket_seconds: int = 0):
+    """Age distribution and creations over time (comma-separated bucket bounds and percentiles)"""
+    try:
+        age_buckets = tuple(int(age) for age in age_buckets.split(',') if age.strip())
+        percentiles = tuple(float(p) for p in percentiles.split(',') if p.strip())
+
+        async def fetch():
+            request = user_pb2.UserStatsRequest(
+                age_buckets=age_buckets, percentiles=percentiles, created_bucket_seconds=bucket_seconds
+            )
+            with get_user_service_stub() as stub:
+                return await stub.UserStats(request, timeout=DEFAULT_TIMEOUT)
+
+        response = await inflight.do(('UserStats', age_buckets, percentiles, bucket_seconds), fetch)
+    except Exception as e:
+        return {"error": str(e)}
+
+    return {
+        "count": response.count,
+        "min_age": response.min_age,
+        "max_age": response.max_age,
+        "mean_age": response.mean_age,
+        "age_percentiles": {f'p{p.percentile:g}': p.age for p in response.age_percentiles},
+        "age_histogram": [
+            {
+                "min_age": bucket.min_age,
+                "max_age": bucket.max_age if bucket.HasField("max_age") else None,
+                "count": bucket.count
+            }
+            for bucket in response.age_histogram
+        ],
+        "ages_below_buckets": response.ages_below_buckets,
+        "created": [{"start": bucket.start, "count": bucket.count} for bucket in response.created],
+        "version": response.version
+    }
 
 @app.get("/api/users/{user_id}")
 async def get_user(user_id: int):
     """Get user by ID"""
     try:
-        stub = get_user_service_stub()
-        request = user_pb2.UserRequest(user_id=user_id)
-        response = stub.GetUser(request)
+        async def fetch():
+            with get_user_service_stub() as stub:
+                return await stub.GetUser(user_pb2.UserRequest(user_id=user_id), timeout=DEFAULT_TIMEOUT)
         
-        return {
-            "user_id": response.user_id,
-            "name": response.name,
-            "email": response.email,
-            "age": response.age,
-            "created_at": response.created_at
-        }
+        response = await inflight.do(('GetUser', user_id), fetch)
+        return user_to_dict(response)
     except Exception as e:
         return {"error": "User not found"}
 
@@ -287,23 +468,61 @@ async def get_user(user_id: int):
 async def create_user(user: CreateUserRequest):
     """Create new user"""
     try:
-        stub = get_user_service_stub()
         request = user_pb2.CreateUserRequest(
             name=user.name,
             email=user.email,
             age=user.age
         )
-        response = stub.CreateUser(request)
+        with get_user_service_stub() as stub:
+            response = await stub.CreateUser(request, timeout=DEFAULT_TIMEOUT)
+        
+        return user_to_dict(response)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/api/users:batchGet")
+async def batch_get_users(batch: BatchGetUsersRequest):
+    """Get several users by ID in one upstream call"""
+    try:
+        request = user_pb2.BatchGetUsersRequest(user_ids=batch.user_ids)
+        with get_user_service_stub() as stub:
+            response = await stub.BatchGetUsers(request, timeout=DEFAULT_TIMEOUT)
         
         return {
-            "user_id": response.user_id,
-            "name": response.name,
-            "email": response.email,
-            "age": response.age,
-            "created_at": response.created_at
+            "users": [user_to_dict(user) for user in response.users],
+            "missing_ids": list(response.missing_ids)
         }
     except Exception as e:
-        return {"error": str(e)}
+        return {"users": [], "missing_ids": [], "error": str(e)}
+
+@app.post("/api/users:batch")
+async def batch_create_users(batch: BatchCreateUsersRequest):
+    """Create several users in one upstream call"""
+    try:
+        request = user_pb2.BatchCreateUsersRequest(users=[
+            user_pb2.CreateUserRequest(name=user.name, email=user.email, age=user.age)
+            for user in batch.users
+        ])
+        with get_user_service_stub() as stub:
+            response = await stub.BatchCreateUsers(request, timeout=DEFAULT_TIMEOUT)
+        
+        return {"users": [user_to_dict(user) for user in response.users]}
+    except Exception as e:
+        return {"users": [], "error": str(e)}
+
+@app.get("/api/stats")
+async def gateway_stats():
+    """Gateway connection statistics"""
+    return {
+        "transport": "in-process" if local_stub is not None else "grpc",
+        "channels": channels.stats(),
+        "singleflight": inflight.stats()
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics of this process"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 def serve():
     """Start the web server"""
@@ -0,0 +1,369 @@
+"""
+Load generator for Service A's UserService and Service C's GetData
+Runs each scenario for a fixed time and reports throughput, latency
+percentiles from an HDR-style histogram (see latency.py) and errors per
+status code.
+
+Closed loop (default): `--concurrency` workers each send the next
+request as soon as the previous one answers. Open loop (`--rate`):
+requests are due at a fixed rate whatever the latency, and latency is
+measured from when a request was due, so time spent queued behind slow
+calls counts (no coordinated omission); `--concurrency` caps how many
+are in flight.
+
+    python main.py bench --scenario get_user list_users --concurrency 16
+    python main.py bench --scenario get_data --api async --rate 2000 --json > run.json
+    python main.py bench --compare run.json
+
+create_user stores real users (bench-*@example.com) in Service A.
+list_users_cached is a conditional ListUsers (if_version set to the last
+version seen), as the web gateways send it: a full listing only after
+the table changed, a not_modified reply otherwise.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+import grpc
+
+# Add the proto directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+
+import user_pb2
+import user_pb2_grpc
+import schema_pb2
+import schema_pb2_grpc
+from client import UserServiceClient
+from latency import LatencyHistogram, git_commit, print_table, print_comparison
+
+SCENARIOS = ['get_user', 'create_user', 'list_users', 'list_users_cached', 'stream_users', 'get_data']
+
+DEFAULT_SCENARIOS = ['get_user', 'list_users', 'get_data']
+
+
+class Pacer:
+    """Hands out request start times to the workers
+
+    Closed loop: None (start now). Open loop: one due time every 1/rate
+    seconds from start, in order, whichever worker asks.
+    """
+
+    def __init__(self, rate, start):
+        self.interval = 1 / rate if rate else None
+        self.start = start
+        self._slots = itertools.count()
+
+    def next_due(self):
+        if self.interval is None:
+            return None
+        return self.start + next(self._slots) * self.interval
+
+
+class CallError(Exception):
+    """A failed request that is not a grpc.RpcError, counted under code"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class WorkerResult:
+    """What one worker measured"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = {}
+
+    def error(self, code):
+        self.errors[code] = self.errors.get(code, 0) + 1
+
+
+class Workload:
+    """Request builders shared by the sync and async runners"""
+
+    def __init__(self, args, user_ids):
+        self.user_ids = user_ids
+        self.page_size = args.page_size
+        self.timeout = args.timeout
+        # Store version of the last listing, for conditional ListUsers
+        self.list_version = 0
+        self._emails = itertools.count()
+        self._tag = f'{os.getpid()}-{int(time.time())}'
+
+    def get_user_request(self):
+        return user_pb2.UserRequest(user_id=random.choice(self.user_ids))
+
+    def create_user_request(self):
+        return user_pb2.CreateUserRequest(
+            name='Bench User',
+            email=f'bench-{self._tag}-{next(self._emails)}@example.com',
+            age=random.randint(18, 80)
+        )
+
+    def list_users_request(self):
+        return user_pb2.ListUsersRequest(page_size=self.page_size)
+
+    def list_users_cached_request(self):
+        return user_pb2.ListUsersRequest(page_size=self.page_size, if_version=self.list_version)
+
+    def listed(self, response):
+        """Remember the version a (conditional) listing returned"""
+        self.list_version = response.version
+
+    @staticmethod
+    def get_data_request():
+        return schema_pb2.RequestMsg(name='bench')
+
+
+def sync_call(scenario, workload, user_stub, data_stub):
+    """Blocking function making one request of scenario"""
+    timeout = workload.timeout
+    if scenario == 'get_user':
+        return lambda: user_stub.GetUser(workload.get_user_request(), timeout=timeout)
+    if scenario == 'create_user':
+        return lambda: user_stub.CreateUser(workload.create_user_request(), timeout=timeout)
+    if scenario == 'list_users':
+        return lambda: user_stub.ListUsers(workload.list_users_request(), timeout=timeout)
+    if scenario == 'list_users_cached':
+        return lambda: workload.listed(
+            user_stub.ListUsers(workload.list_users_cached_request(), timeout=timeout)
+        )
+    if scenario == 'stream_users':
+        def stream():
+            for _ in user_stub.StreamUsers(workload.list_users_request(), timeout=timeout):
+                pass
+        return stream
+    return lambda: data_stub.GetData(workload.get_data_request(), timeout=timeout)
+
+
+def async_call(scenario, workload):
+    """Coroutine function (user_stub, data_stub) making one request of scenario"""
+    timeout = workload.timeout
+    if scenario == 'stream_users':
+        async def stream(user_stub, data_stub):
+            async for _ in user_stub.StreamUsers(workload.list_users_request(), timeout=timeout):
+                pass
+        return stream
+
+    async def unary(user_stub, data_stub):
+        if scenario == 'get_user':
+            await user_stub.GetUser(workload.get_user_request(), timeout=timeout)
+        elif scenario == 'create_user':
+            await user_stub.CreateUser(workload.create_user_request(), timeout=timeout)
+        elif scenario == 'list_users':
+            await user_stub.ListUsers(workload.list_users_request(), timeout=timeout)
+        elif scenario == 'list_users_cached':
+            workload.listed(
+                await user_stub.ListUsers(workload.list_users_cached_request(), timeout=timeout)
+            )
+        else:
+            await data_stub.GetData(workload.get_data_request(), timeout=timeout)
+    return unary
+
+
+def run_sync(calls, duration, rate):
+    """Drive one blocking call function per worker thread; returns (results, seconds)"""
+    start = time.perf_counter()
+    deadline = start + duration
+    pacer = Pacer(rate, start)
+    results = [WorkerResult() for _ in calls]
+
+    def worker(call, result):
+        while True:
+            due = pacer.next_due()
+            if due is None:
+                due = time.perf_counter()
+            if due >= deadline:
+                return
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                call()
+            except grpc.RpcError as e:
+                result.error(e.code().name)
+                continue
+            except CallError as e:
+                result.error(e.code)
+                continue
+            result.histogram.record(time.perf_counter() - due)
+
+    threads = [threading.Thread(target=worker, args=pair, daemon=True) for pair in zip(calls, results)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+async def run_async(call, concurrency, duration, rate):
+    """Drive a coroutine function from `concurrency` tasks; returns (results, seconds)"""
+    start = time.perf_counter()
+    deadline = start + duration
+    pacer = Pacer(rate, start)
+    results = [WorkerResult() for _ in range(concurrency)]
+
+    async def worker(result):
+        while True:
+            due = pacer.next_due()
+            if due is None:
+                due = time.perf_counter()
+            if due >= deadline:
+                return
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await call()
+            except grpc.RpcError as e:
+                result.error(e.code().name)
+                continue
+            except CallError as e:
+                result.error(e.code)
+                continue
+            result.histogram.record(time.perf_counter() - due)
+
+    await asyncio.gather(*(worker(result) for result in results))
+    return results, time.perf_counter() - start
+
+
+def summarize(scenario, args, results, seconds):
+    histogram = LatencyHistogram()
+    errors = {}
+    for result in results:
+        histogram.merge(result.histogram)
+        for code, count in result.errors.items():
+            errors[code] = errors.get(code, 0) + count
+    requests = histogram.count + sum(errors.values())
+    return {
+        "name": f'{scenario}/{args.api}',
+        "scenario": scenario,
+        "api": args.api,
+        "mode": 'open' if args.rate else 'closed',
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "seconds": round(seconds, 3),
+        "requests": requests,
+        "qps": round(histogram.count / seconds, 1),
+        "errors": errors,
+        "error_rate": sum(errors.values()) / requests if requests else 0.0,
+        "latency": histogram.to_dict(),
+    }
+
+
+def existing_user_ids(target):
+    """IDs of (up to 1000) users already in Service A, for get_user"""
+    client = UserServiceClient(target=target)
+    try:
+        response = client.stub.ListUsers(user_pb2.ListUsersRequest(page_size=1000), timeout=10)
+    finally:
+        client.close()
+    return [user.user_id for user in response.users]
+
+
+def bench_sync(args, scenario, workload):
+    clients = [UserServiceClient(target=args.target) for _ in range(args.channels)]
+    data_channels = [grpc.insecure_channel(args.service_c_target) for _ in range(args.channels)]
+    try:
+        calls = [
+            sync_call(scenario, workload, clients[i % args.channels].stub,
+                      schema_pb2_grpc.MyServiceStub(data_channels[i % args.channels]))
+            for i in range(args.concurrency)
+        ]
+        if args.warmup > 0:
+            run_sync(calls, args.warmup, args.rate)
+        return run_sync(calls, args.duration, args.rate)
+    finally:
+        for client in clients:
+            client.close()
+        for channel in data_channels:
+            channel.close()
+
+
+async def bench_async(args, scenario, workload):
+    user_channels = [grpc.aio.insecure_channel(args.target) for _ in range(args.channels)]
+    data_channels = [grpc.aio.insecure_channel(args.service_c_target) for _ in range(args.channels)]
+    try:
+        # Channels are picked per call, round-robin
+        user_stubs = itertools.cycle([user_pb2_grpc.UserServiceStub(c) for c in user_channels])
+        data_stubs = itertools.cycle([schema_pb2_grpc.MyServiceStub(c) for c in data_channels])
+        request = async_call(scenario, workload)
+
+        async def call():
+            await request(next(user_stubs), next(data_stubs))
+
+        if args.warmup > 0:
+            await run_async(call, args.concurrency, args.warmup, args.rate)
+        return await run_async(call, args.concurrency, args.duration, args.rate)
+    finally:
+        for channel in user_channels + data_channels:
+            await channel.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py bench', description='Load test Service A and C over gRPC')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS, default=DEFAULT_SCENARIOS,
+                        help='What to call (default: get_user list_users get_data)')
+    parser.add_argument('--api', choices=['sync', 'async'], default='sync',
+                        help='Blocking stubs on worker threads, or grpc.aio on one event loop (default: sync)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Workers (closed loop) or most requests in flight (open loop) (default: 8)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Open loop: requests per second, all workers together (default: closed loop)')
+    parser.add_argument('--duration', type=float, default=10, help='Measured seconds per scenario (default: 10)')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured seconds first (default: 2)')
+    parser.add_argument('--channels', type=int, default=1, help='gRPC channels per service (default: 1)')
+    parser.add_argument('--page-size', type=int, default=100,
+                        help='page_size for list_users / stream_users, 0 = all users (default: 100)')
+    parser.add_argument('--timeout', type=float, default=5, help='Per-call deadline in seconds (default: 5)')
+    parser.add_argument('--target', default=os.environ.get('USER_SERVICE_TARGET', 'localhost:50051'),
+                        help='Service A address (default: $USER_SERVICE_TARGET or localhost:50051)')
+    parser.add_argument('--service-c-target', default=os.environ.get('SERVICE_C_TARGET', 'localhost:50052'),
+                        help='Service C address (default: $SERVICE_C_TARGET or localhost:50052)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='Show changes against a report saved with --json')
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.channels < 1:
+        parser.error('--concurrency and --channels must be at least 1')
+
+    user_ids = []
+    if 'get_user' in args.scenario:
+        try:
+            user_ids = existing_user_ids(args.target)
+        except grpc.RpcError as e:
+            sys.exit(f'Cannot reach Service A at {args.target}: {e.details()}')
+        if not user_ids:
+            sys.exit('Service A has no users to get')
+    workload = Workload(args, user_ids)
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec='seconds'),
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ('json', 'compare')},
+        "results": [],
+    }
+    for scenario in args.scenario:
+        if args.api == 'async':
+            results, seconds = asyncio.run(bench_async(args, scenario, workload))
+        else:
+            results, seconds = bench_sync(args, scenario, workload)
+        report["results"].append(summarize(scenario, args, results, seconds))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report["results"])
+    if args.compare:
+        # Keep stdout valid JSON when the report goes there
+        print_comparison(report["results"], args.compare, sys.stderr if args.json else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
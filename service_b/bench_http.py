@@ -0,0 +1,290 @@
+"""
+HTTP load test for the three FastAPI gateways
+Drives each gateway route, then the gRPC call behind it directly with
+the same load, and reports how much latency and throughput the web tier
+(HTTP parsing, pydantic validation, JSON encoding and the hop to gRPC)
+adds on top. Load models and the report format are those of bench.py.
+
+    python main.py bench-http
+    python main.py bench-http --route a-user c-data --concurrency 16 --duration 20
+    python main.py bench-http --json > http.json; python main.py bench-http --compare http.json
+
+Requests go over plain keep-alive HTTP/1.1 connections (one per worker)
+from a minimal asyncio client, so the client costs little next to the
+gateway being measured. a-create stores real users in Service A.
+The direct run of a-users/b-users is the conditional ListUsers the
+gateways send (list_users_cached), so both sides do the same work. Each
+gateway's /api/stats tells how it reaches Service A: over gRPC, or
+in-process (Service A's default), in which case there is no gRPC hop
+in the HTTP path to compare against.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import grpc
+
+from bench import (
+    CallError, Workload, bench_async, existing_user_ids, run_async, summarize
+)
+from latency import git_commit, print_table, print_comparison
+
+
+class Route:
+    """A gateway route and the gRPC scenario (see bench.py) it fronts"""
+
+    def __init__(self, port, method, path, scenario):
+        self.port = port
+        self.method = method
+        self.path = path
+        self.scenario = scenario
+
+    def label(self):
+        return f'{self.method} :{self.port}{self.path}'
+
+
+ROUTES = {
+    'a-users': Route(8001, 'GET', '/api/users', 'list_users_cached'),
+    'a-user': Route(8001, 'GET', '/api/users/{id}', 'get_user'),
+    'a-create': Route(8001, 'POST', '/api/users', 'create_user'),
+    'b-users': Route(8002, 'GET', '/api/users', 'list_users_cached'),
+    'c-data': Route(8003, 'POST', '/api/data', 'get_data'),
+}
+
+DEFAULT_ROUTES = ['a-users', 'a-user', 'b-users', 'c-data']
+
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, body=None):
+        """Send one request; returns (status, body bytes)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        head = f'{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+        if body is not None:
+            head += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+        self._writer.write(head.encode('ascii') + b'\r\n' + (body or b''))
+
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            data = b''.join(chunks)
+        else:
+            data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, data
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+class GatewayCaller:
+    """Makes one request to a route per call, over pooled connections"""
+
+    def __init__(self, route, workload, host):
+        self.route = route
+        self.workload = workload
+        self.host = host
+        self._pool = []
+        self._emails = itertools.count()
+        self._tag = f'{os.getpid()}-{int(time.time())}'
+
+    def _request(self):
+        """(path, JSON body or None) of the next request"""
+        route = self.route
+        if route.scenario == 'get_user':
+            return route.path.replace('{id}', str(random.choice(self.workload.user_ids))), None
+        if route.scenario == 'create_user':
+            body = {"name": "Bench User", "email": f'bench-http-{self._tag}-{next(self._emails)}@example.com',
+                    "age": random.randint(18, 80)}
+            return route.path, json.dumps(body).encode()
+        if route.scenario == 'get_data':
+            return route.path, b'{"name":"bench"}'
+        return route.path, None
+
+    async def __call__(self):
+        connection = self._pool.pop() if self._pool else HttpConnection(self.host, self.route.port)
+        path, body = self._request()
+        try:
+            status, data = await asyncio.wait_for(
+                connection.request(self.route.method, path, body), self.workload.timeout
+            )
+        except asyncio.TimeoutError:
+            connection.close()
+            raise CallError('TIMEOUT')
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            connection.close()
+            raise CallError('CONNECTION_ERROR')
+        self._pool.append(connection)
+        if status >= 400:
+            raise CallError(f'HTTP_{status}')
+        # The gateways report upstream failures as 200 with an "error" key
+        if b'"error":' in data:
+            raise CallError('ERROR_BODY')
+
+    def close(self):
+        for connection in self._pool:
+            connection.close()
+
+
+async def gateway_transport(host, port):
+    """How the gateway on port calls its upstream: 'grpc', 'in-process', or None if unknown"""
+    connection = HttpConnection(host, port)
+    try:
+        status, data = await asyncio.wait_for(connection.request('GET', '/api/stats'), 5)
+        if status != 200:
+            return None
+        # Only Service A's gateway can skip gRPC; the others do not say
+        return json.loads(data).get("transport", "grpc")
+    except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        return None
+    finally:
+        connection.close()
+
+
+def overhead(route_key, route, http, direct):
+    """What the gateway adds to the direct gRPC call"""
+    return {
+        "route": route_key,
+        "label": route.label(),
+        "transport": http.get("transport"),
+        "p50_us": http["latency"]["p50_us"] - direct["latency"]["p50_us"],
+        "p99_us": http["latency"]["p99_us"] - direct["latency"]["p99_us"],
+        "qps_ratio": round(http["qps"] / direct["qps"], 3) if direct["qps"] else None,
+    }
+
+
+def print_overhead(rows, results):
+    by_name = {result["name"]: result for result in results}
+    print('\nGateway overhead (HTTP minus direct gRPC):')
+    print(f'{"route":<28}{"via":>12}{"http p50":>10}{"grpc p50":>10}{"+p50 µs":>10}'
+          f'{"http p99":>10}{"grpc p99":>10}{"+p99 µs":>10}{"qps ratio":>11}')
+    for row in rows:
+        http = by_name[f'{row["route"]}/http']["latency"]
+        direct = by_name[f'{row["route"]}/grpc']["latency"]
+        print(f'{row["label"]:<28}{row["transport"] or "?":>12}'
+              f'{http["p50_us"]:>10}{direct["p50_us"]:>10}{row["p50_us"]:>+10}'
+              f'{http["p99_us"]:>10}{direct["p99_us"]:>10}{row["p99_us"]:>+10}'
+              f'{row["qps_ratio"] if row["qps_ratio"] is not None else "n/a":>11}')
+    if any(row["transport"] == 'in-process' for row in rows):
+        print('in-process: the gateway calls the servicer directly, so the HTTP path has no gRPC hop '
+              'and the difference is not the cost of the web tier alone '
+              '(start Service A with --no-in-process to measure through gRPC)')
+
+
+async def bench_route(args, route, workload):
+    """Measure route through its gateway; returns (results, seconds)"""
+    call = GatewayCaller(route, workload, args.host)
+    try:
+        if args.warmup > 0:
+            await run_async(call, args.concurrency, args.warmup, args.rate)
+        return await run_async(call, args.concurrency, args.duration, args.rate)
+    finally:
+        call.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='main.py bench-http',
+                                     description='Load test the FastAPI gateways against direct gRPC')
+    parser.add_argument('--route', nargs='+', choices=list(ROUTES), default=DEFAULT_ROUTES,
+                        help='Routes to drive (default: a-users a-user b-users c-data)')
+    parser.add_argument('--host', default='localhost', help='Gateway host (ports 8001-8003)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Workers (closed loop) or most requests in flight (open loop) (default: 8)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Open loop: requests per second (default: closed loop)')
+    parser.add_argument('--duration', type=float, default=10, help='Measured seconds per run (default: 10)')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured seconds first (default: 2)')
+    parser.add_argument('--timeout', type=float, default=5, help='Per-request deadline in seconds (default: 5)')
+    parser.add_argument('--no-grpc', action='store_true', help='Skip the direct gRPC runs')
+    parser.add_argument('--target', default=os.environ.get('USER_SERVICE_TARGET', 'localhost:50051'),
+                        help='Service A gRPC address for the direct runs')
+    parser.add_argument('--service-c-target', default=os.environ.get('SERVICE_C_TARGET', 'localhost:50052'),
+                        help='Service C gRPC address for the direct runs')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='Show changes against a report saved with --json')
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    # Settings bench.py's direct runs read: the gateways list every user
+    args.api = 'async'
+    args.channels = 1
+    args.page_size = 0
+
+    user_ids = []
+    if any(ROUTES[key].scenario == 'get_user' for key in args.route):
+        try:
+            user_ids = existing_user_ids(args.target)
+        except grpc.RpcError as e:
+            sys.exit(f'Cannot reach Service A at {args.target}: {e.details()}')
+        if not user_ids:
+            sys.exit('Service A has no users to get')
+    workload = Workload(args, user_ids)
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec='seconds'),
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ('json', 'compare')},
+        "transports": {},
+        "results": [],
+        "overhead": [],
+    }
+    for key in args.route:
+        route = ROUTES[key]
+        if route.port not in report["transports"]:
+            report["transports"][route.port] = asyncio.run(gateway_transport(args.host, route.port))
+        results, seconds = asyncio.run(bench_route(args, route, workload))
+        http = summarize(route.scenario, args, results, seconds)
+        http.update(name=f'{key}/http', api='http', route=route.label(),
+                    transport=report["transports"][route.port])
+        report["results"].append(http)
+        if args.no_grpc:
+            continue
+        results, seconds = asyncio.run(bench_async(args, route.scenario, workload))
+        direct = summarize(route.scenario, args, results, seconds)
+        direct.update(name=f'{key}/grpc', api='grpc', route=route.label())
+        report["results"].append(direct)
+        report["overhead"].append(overhead(key, route, http, direct))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report["results"])
+        if report["overhead"]:
+            print_overhead(report["overhead"], report["results"])
+    if args.compare:
+        print_comparison(report["results"], args.compare, sys.stderr if args.json else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,129 @@
 import grpc
 import sys
 import os
+import threading
+import time
 
 # Add the proto directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
 
 import user_pb2
 import user_pb2_grpc
+from user_cache import UserCache, DEFAULT_TTL, DEFAULT_NEGATIVE_TTL
+
+# Seconds between change checks when the cache is invalidated by polling
+DEFAULT_CHECK_INTERVAL = 1.0
+
+# Seconds to wait before reopening a broken WatchUsers stream
+WATCH_RETRY_SECONDS = 1.0
 
 
 class UserServiceClient:
-    """Client for UserService gRPC"""
+    """Client for UserService gRPC
+
+    Pass cache_size to serve repeated get_user calls from an in-process
+    LRU (see user_cache.UserCache). Cached users are invalidated either
+    by asking ListUsersSince for changes at most every check_interval
+    seconds on the read path (invalidation='poll', the default) or from a
+    background WatchUsers stream (invalidation='watch'); with None they
+    only expire by TTL. A watch stream holds a server thread on a thread
+    mode Service A, which caps how many it accepts; a client refused one
+    falls back to polling.
+
+    target, any gRPC target such as 'unix:/tmp/service_a.sock' for a Unix
+    domain socket, overrides host and port.
+    """
     
-    def __init__(self, host='localhost', port='50051'):
-        self.channel = grpc.insecure_channel(f'{host}:{port}')
+    def __init__(self, host='localhost', port='50051', cache_size=0, cache_ttl=DEFAULT_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, invalidation='poll',
+                 check_interval=DEFAULT_CHECK_INTERVAL, target=None):
+        if invalidation not in ('watch', 'poll', None):
+            raise ValueError(f'Unknown invalidation mode {invalidation!r}')
+        self.target = target or f'{host}:{port}'
+        self.channel = grpc.insecure_channel(self.target)
         self.stub = user_pb2_grpc.UserServiceStub(self.channel)
+        self.cache = UserCache(cache_size, cache_ttl, negative_ttl) if cache_size > 0 else None
+        self.invalidation = invalidation if self.cache is not None else None
+        self.check_interval = check_interval
+        self._closed = False
+        self._seq = 0
+        self._next_check = 0.0
+        self._watch = None
+        if self.invalidation == 'watch':
+            threading.Thread(target=self._watch_changes, daemon=True).start()
+    
+    def _watch_changes(self):
+        """Invalidate cached users from the WatchUsers feed until close()"""
+        since_seq = 0
+        while not self._closed:
+            try:
+                self._watch = self.stub.WatchUsers(user_pb2.WatchUsersRequest(since_seq=since_seq))
+                for event in self._watch:
+                    if event.type == user_pb2.UserEvent.RESET:
+                        self.cache.clear()
+                    elif event.type == user_pb2.UserEvent.CHANGED:
+                        self.cache.invalidate(event.user.user_id)
+                    since_seq = max(since_seq, event.seq)
+            except grpc.RpcError as e:
+                if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                    # The server has no room for another watcher
+                    self.invalidation = 'poll'
+                    return
+            if not self._closed:
+                time.sleep(WATCH_RETRY_SECONDS)
+    
+    def _check_for_changes(self):
+        """Invalidate users changed since the last check (poll mode)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            if not self._seq:
+                # Start from the current version instead of replaying the table
+                response = self.stub.ListUsers(user_pb2.ListUsersRequest(page_size=1))
+                self.cache.clear()
+                self._seq = response.version
+                return
+            response = self.stub.ListUsersSince(user_pb2.ListUsersSinceRequest(since_seq=self._seq))
+        except grpc.RpcError:
+            return
+        if response.full_snapshot:
+            self.cache.clear()
+        else:
+            for user in response.users:
+                self.cache.invalidate(user.user_id)
+        self._seq = response.seq
     
     def get_user(self, user_id):
         """Get user by ID"""
+        generation = None
+        if self.cache is not None:
+            if self.invalidation == 'poll':
+                self._check_for_changes()
+            hit, user = self.cache.get(user_id)
+            if hit:
+                if user is None:
+                    print(f'❌ Error: User with ID {user_id} not found')
+                return user
+            generation = self.cache.generation
+        
         try:
             request = user_pb2.UserRequest(user_id=user_id)
             response = self.stub.GetUser(request)
-            return response
         except grpc.RpcError as e:
+            if generation is not None and e.code() == grpc.StatusCode.NOT_FOUND:
+                self.cache.put(user_id, None, generation)
             print(f'❌ Error: {e.details()}')
             return None
+        
+        if generation is not None:
+            self.cache.put(user_id, response, generation)
+        return response
+    
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the user cache, or None without one"""
+        return self.cache.stats() if self.cache is not None else None
     
     def create_user(self, name, email, age):
         """Create a new user"""
@@ -35,6 +134,9 @@ class UserServiceClient:
                 age=age
             )
             response = self.stub.CreateUser(request)
+            if self.cache is not None:
+                # Forget a cached NOT_FOUND for the new ID
+                self.cache.invalidate(response.user_id)
             return response
         except grpc.RpcError as e:
             print(f'❌ Error: {e.details()}')
@@ -43,7 +145,7 @@ class UserServiceClient:
     def list_users(self):
         """List all users"""
         try:
-            request = user_pb2.Empty()
+            request = user_pb2.ListUsersRequest()
             response = self.stub.ListUsers(request)
             return response
         except grpc.RpcError as e:
@@ -52,6 +154,9 @@ class UserServiceClient:
     
     def close(self):
         """Close the gRPC channel"""
+        self._closed = True
+        if self._watch is not None:
+            self._watch.cancel()
         self.channel.close()
 
 
@@ -71,7 +176,7 @@ def main():
     print('=' * 50)
     
     # Create client
-    client = UserServiceClient()
+    client = UserServiceClient(target=os.environ.get('USER_SERVICE_TARGET'))
     
     print('\n📋 Listing all users:')
     print('-' * 50)
@@ -0,0 +1,140 @@
+"""
+Latency histograms and reports for the Service B benchmarks
+The histogram is HDR-style: values up to 255 µs are counted exactly and
+larger ones in buckets whose width grows with the value, so any recorded
+value is within 0.8% of what the histogram reports for it while the whole
+range (microseconds to minutes) takes a few thousand counters at most.
+"""
+import json
+import os
+import subprocess
+import sys
+
+# Exact-value range and sub-bucket resolution: 2**SUB_BITS
+SUB_BITS = 8
+_HALF = 1 << (SUB_BITS - 1)
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _bucket(micros):
+    if micros < 1 << SUB_BITS:
+        return micros
+    shift = micros.bit_length() - SUB_BITS
+    return (shift + 1) * _HALF + (micros >> shift) - _HALF
+
+
+def _highest_value(bucket):
+    """Largest value counted in bucket"""
+    if bucket < 1 << SUB_BITS:
+        return bucket
+    shift = bucket // _HALF - 1
+    top = bucket % _HALF + _HALF
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Counts of latencies in microseconds, in log-linear buckets
+
+    Not thread-safe: give each worker its own and merge() them.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds):
+        micros = max(int(seconds * 1e6), 0)
+        bucket = _bucket(micros)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += micros
+        if self.min is None or micros < self.min:
+            self.min = micros
+        if micros > self.max:
+            self.max = micros
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        """Latency (µs) that p percent of the recorded values do not exceed"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(_highest_value(bucket), self.max)
+        return self.max
+
+    def to_dict(self):
+        """Summary plus the non-empty buckets as [highest value µs, count]"""
+        summary = {
+            "count": self.count,
+            "min_us": self.min or 0,
+            "mean_us": round(self.total / self.count, 1) if self.count else 0,
+            "max_us": self.max,
+        }
+        for p in PERCENTILES:
+            summary[f'p{p:g}_us'] = self.percentile(p)
+        summary["buckets"] = [[_highest_value(bucket), self.counts[bucket]] for bucket in sorted(self.counts)]
+        return summary
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git tree"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_table(results, columns=()):
+    """One line per result; columns are extra (key, heading) pairs shown first"""
+    headings = ''.join(f'{heading:>10}' for _, heading in columns)
+    print(f'{"name":<28}{headings}{"qps":>10}{"p50 µs":>10}{"p90 µs":>10}{"p99 µs":>10}'
+          f'{"p99.9 µs":>10}{"max µs":>10}{"errors":>9}')
+    for result in results:
+        latency = result["latency"]
+        extra = ''.join(f'{result.get(key, ""):>10}' for key, _ in columns)
+        print(f'{result["name"]:<28}{extra}{result["qps"]:>10}{latency["p50_us"]:>10}'
+              f'{latency["p90_us"]:>10}{latency["p99_us"]:>10}{latency["p99.9_us"]:>10}'
+              f'{latency["max_us"]:>10}{result["error_rate"]:>9.2%}')
+    for result in results:
+        if result["errors"]:
+            codes = ', '.join(f'{code} {count}' for code, count in sorted(result["errors"].items()))
+            print(f'  {result["name"]} errors: {codes}')
+
+
+def print_comparison(results, baseline_path, out=sys.stdout):
+    """Change in QPS and p50/p99 against a JSON report written earlier"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    def change(new, old):
+        return f'{(new - old) / old:+.1%}' if old else 'n/a'
+
+    print(f'\nCompared with {baseline_path}:', file=out)
+    print(f'{"name":<28}{"qps":>10}{"p50":>10}{"p99":>10}', file=out)
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None:
+            print(f'{result["name"]:<28}{"(not in baseline)":>30}', file=out)
+            continue
+        print(f'{result["name"]:<28}{change(result["qps"], old["qps"]):>10}'
+              f'{change(result["latency"]["p50_us"], old["latency"]["p50_us"]):>10}'
+              f'{change(result["latency"]["p99_us"], old["latency"]["p99_us"]):>10}', file=out)
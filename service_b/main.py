@@ -1,13 +1,26 @@
 """
 Service B - gRPC Client + Web Interface
-Main entry point with web UI
+Main entry point with web UI; `python main.py bench ...` and
+`python main.py bench-http ...` run the load generators instead (see
+bench.py and bench_http.py)
 """
-from web_server import serve as serve_web
+import sys
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['bench']:
+        from bench import main as bench
+        bench(sys.argv[2:])
+        sys.exit()
+    if sys.argv[1:2] == ['bench-http']:
+        from bench_http import main as bench_http
+        bench_http(sys.argv[2:])
+        sys.exit()
+
+    from web_server import serve as serve_web
+
     print('=' * 50)
     print('Starting Service B')
     print('=' * 50)
     
     # Start web server
-    serve_web()
\ No newline at end of file
+    serve_web()
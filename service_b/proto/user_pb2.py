@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nuser.proto\x12\x04user\"\x07\n\x05\x45mpty\"\x1e\n\x0bUserRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\"=\n\x11\x43reateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x0b\n\x03\x61ge\x18\x03 \x01(\x05\"]\n\x0cUserResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x0b\n\x03\x61ge\x18\x04 \x01(\x05\x12\x12\n\ncreated_at\x18\x05 \x01(\t\"5\n\x10UserListResponse\x12!\n\x05users\x18\x01 \x03(\x0b\x32\x12.user.UserResponse2\xac\x01\n\x0bUserService\x12\x30\n\x07GetUser\x12\x11.user.UserRequest\x1a\x12.user.UserResponse\x12\x39\n\nCreateUser\x12\x17.user.CreateUserRequest\x1a\x12.user.UserResponse\x12\x30\n\tListUsers\x12\x0b.user.Empty\x1a\x16.user.UserListResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nuser.proto\x12\x04user\"\x07\n\x05\x45mpty\"\x1e\n\x0bUserRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\"=\n\x11\x43reateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x0b\n\x03\x61ge\x18\x03 \x01(\x05\"]\n\x0cUserResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x0b\n\x03\x61ge\x18\x04 \x01(\x05\x12\x12\n\ncreated_at\x18\x05 \x01(\t\"M\n\x10ListUsersRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12\x12\n\nif_version\x18\x03 \x01(\x03\"u\n\x10UserListResponse\x12!\n\x05users\x18\x01 \x03(\x0b\x32\x12.user.UserResponse\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\x03\x12\x14\n\x0cnot_modified\x18\x04 \x01(\x08\"(\n\x14\x42\x61tchGetUsersRequest\x12\x10\n\x08user_ids\x18\x01 \x03(\x05\"O\n\x15\x42\x61tchGetUsersResponse\x12!\n\x05users\x18\x01 \x03(\x0b\x32\x12.user.UserResponse\x12\x13\n\x0bmissing_ids\x18\x02 \x03(\x05\"A\n\x17\x42\x61tchCreateUsersRequest\x12&\n\x05users\x18\x01 \x03(\x0b\x32\x17.user.CreateUserRequest\"\x1d\n\x0c\x45mailRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"B\n\x0f\x41geRangeRequest\x12\x0f\n\x07min_age\x18\x01 \x01(\x05\x12\x0f\n\x07max_age\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\".\n\rSearchRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"*\n\x15ListUsersSinceRequest\x12\x11\n\tsince_seq\x18\x01 \x01(\x03\"\\\n\x13UserChangesResponse\x12!\n\x05users\x18\x01 \x03(\x0b\x32\x12.user.UserResponse\x12\x0b\n\x03seq\x18\x02 \x01(\x03\x12\x15\n\rfull_snapshot\x18\x03 \x01(\x08\"&\n\x11WatchUsersRequest\x12\x11\n\tsince_seq\x18\x01 \x01(\x03\"\x8a\x01\n\tUserEvent\x12\"\n\x04type\x18\x01 \x01(\x0e\x32\x14.user.UserEvent.Type\x12 \n\x04user\x18\x02 \x01(\x0b\x32\x12.user.UserResponse\x12\x0b\n\x03seq\x18\x03 \x01(\x03\"*\n\x04Type\x12\x0b\n\x07\x43HANGED\x10\x00\x12\t\n\x05RESET\x10\x01\x12\n\n\x06SYNCED\x10\x02\"\\\n\x10UserStatsRequest\x12\x13\n\x0b\x61ge_buckets\x18\x01 \x03(\x05\x12\x13\n\x0bpercentiles\x18\x02 \x03(\x01\x12\x1e\n\x16\x63reated_bucket_seconds\x18\x03 \x01(\x03\"M\n\tAgeBucket\x12\x0f\n\x07min_age\x18\x01 \x01(\x05\x12\x14\n\x07max_age\x18\x02 \x01(\x05H\x00\x88\x01\x01\x12\r\n\x05\x63ount\x18\x03 \x01(\x03\x42\n\n\x08_max_age\"0\n\rAgePercentile\x12\x12\n\npercentile\x18\x01 \x01(\x01\x12\x0b\n\x03\x61ge\x18\x02 \x01(\x01\"-\n\rCreatedBucket\x12\r\n\x05start\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\"\xff\x01\n\x11UserStatsResponse\x12\r\n\x05\x63ount\x18\x01 \x01(\x03\x12\x0f\n\x07min_age\x18\x02 \x01(\x05\x12\x0f\n\x07max_age\x18\x03 \x01(\x05\x12\x10\n\x08mean_age\x18\x04 \x01(\x01\x12,\n\x0f\x61ge_percentiles\x18\x05 \x03(\x0b\x32\x13.user.AgePercentile\x12&\n\rage_histogram\x18\x06 \x03(\x0b\x32\x0f.user.AgeBucket\x12\x1a\n\x12\x61ges_below_buckets\x18\x07 \x01(\x03\x12$\n\x07\x63reated\x18\x08 \x03(\x0b\x32\x13.user.CreatedBucket\x12\x0f\n\x07version\x18\t \x01(\x03\x32\x83\x06\n\x0bUserService\x12\x30\n\x07GetUser\x12\x11.user.UserRequest\x1a\x12.user.UserResponse\x12\x39\n\nCreateUser\x12\x17.user.CreateUserRequest\x1a\x12.user.UserResponse\x12;\n\tListUsers\x12\x16.user.ListUsersRequest\x1a\x16.user.UserListResponse\x12;\n\x0bStreamUsers\x12\x16.user.ListUsersRequest\x1a\x12.user.UserResponse0\x01\x12H\n\rBatchGetUsers\x12\x1a.user.BatchGetUsersRequest\x1a\x1b.user.BatchGetUsersResponse\x12I\n\x10\x42\x61tchCreateUsers\x12\x1d.user.BatchCreateUsersRequest\x1a\x16.user.UserListResponse\x12\x38\n\x0eGetUserByEmail\x12\x12.user.EmailRequest\x1a\x12.user.UserResponse\x12@\n\x0fQueryUsersByAge\x12\x15.user.AgeRangeRequest\x1a\x16.user.UserListResponse\x12:\n\x0bSearchUsers\x12\x13.user.SearchRequest\x1a\x16.user.UserListResponse\x12H\n\x0eListUsersSince\x12\x1b.user.ListUsersSinceRequest\x1a\x19.user.UserChangesResponse\x12\x38\n\nWatchUsers\x12\x17.user.WatchUsersRequest\x1a\x0f.user.UserEvent0\x01\x12<\n\tUserStats\x12\x16.user.UserStatsRequest\x1a\x17.user.UserStatsResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -39,8 +39,42 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_CREATEUSERREQUEST']._serialized_end=122
   _globals['_USERRESPONSE']._serialized_start=124
   _globals['_USERRESPONSE']._serialized_end=217
-  _globals['_USERLISTRESPONSE']._serialized_start=219
-  _globals['_USERLISTRESPONSE']._serialized_end=272
-  _globals['_USERSERVICE']._serialized_start=275
-  _globals['_USERSERVICE']._serialized_end=447
+  _globals['_LISTUSERSREQUEST']._serialized_start=219
+  _globals['_LISTUSERSREQUEST']._serialized_end=296
+  _globals['_USERLISTRESPONSE']._serialized_start=298
+  _globals['_USERLISTRESPONSE']._serialized_end=415
+  _globals['_BATCHGETUSERSREQUEST']._serialized_start=417
+  _globals['_BATCHGETUSERSREQUEST']._serialized_end=457
+  _globals['_BATCHGETUSERSRESPONSE']._serialized_start=459
+  _globals['_BATCHGETUSERSRESPONSE']._serialized_end=538
+  _globals['_BATCHCREATEUSERSREQUEST']._serialized_start=540
+  _globals['_BATCHCREATEUSERSREQUEST']._serialized_end=605
+  _globals['_EMAILREQUEST']._serialized_start=607
+  _globals['_EMAILREQUEST']._serialized_end=636
+  _globals['_AGERANGEREQUEST']._serialized_start=638
+  _globals['_AGERANGEREQUEST']._serialized_end=704
+  _globals['_SEARCHREQUEST']._serialized_start=706
+  _globals['_SEARCHREQUEST']._serialized_end=752
+  _globals['_LISTUSERSSINCEREQUEST']._serialized_start=754
+  _globals['_LISTUSERSSINCEREQUEST']._serialized_end=796
+  _globals['_USERCHANGESRESPONSE']._serialized_start=798
+  _globals['_USERCHANGESRESPONSE']._serialized_end=890
+  _globals['_WATCHUSERSREQUEST']._serialized_start=892
+  _globals['_WATCHUSERSREQUEST']._serialized_end=930
+  _globals['_USEREVENT']._serialized_start=933
+  _globals['_USEREVENT']._serialized_end=1071
+  _globals['_USEREVENT_TYPE']._serialized_start=1029
+  _globals['_USEREVENT_TYPE']._serialized_end=1071
+  _globals['_USERSTATSREQUEST']._serialized_start=1073
+  _globals['_USERSTATSREQUEST']._serialized_end=1165
+  _globals['_AGEBUCKET']._serialized_start=1167
+  _globals['_AGEBUCKET']._serialized_end=1244
+  _globals['_AGEPERCENTILE']._serialized_start=1246
+  _globals['_AGEPERCENTILE']._serialized_end=1294
+  _globals['_CREATEDBUCKET']._serialized_start=1296
+  _globals['_CREATEDBUCKET']._serialized_end=1341
+  _globals['_USERSTATSRESPONSE']._serialized_start=1344
+  _globals['_USERSTATSRESPONSE']._serialized_end=1599
+  _globals['_USERSERVICE']._serialized_start=1602
+  _globals['_USERSERVICE']._serialized_end=2373
 # @@protoc_insertion_point(module_scope)
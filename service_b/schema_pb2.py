@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: schema.proto
+# Protobuf Python Version: 5.29.0
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    29,
+    0,
+    '',
+    'schema.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cschema.proto\x12\x04\x64\x65mo\"\x1a\n\nRequestMsg\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1b\n\x08ReplyMsg\x12\x0f\n\x07message\x18\x01 \x01(\t28\n\tMyService\x12+\n\x07GetData\x12\x10.demo.RequestMsg\x1a\x0e.demo.ReplyMsgb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'schema_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_REQUESTMSG']._serialized_start=22
+  _globals['_REQUESTMSG']._serialized_end=48
+  _globals['_REPLYMSG']._serialized_start=50
+  _globals['_REPLYMSG']._serialized_end=77
+  _globals['_MYSERVICE']._serialized_start=79
+  _globals['_MYSERVICE']._serialized_end=135
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,92 @@
+"""
+In-process read-through cache for UserServiceClient
+An LRU of UserResponse messages with a TTL, which also remembers IDs that
+came back NOT_FOUND for a shorter time
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_TTL = 60.0
+DEFAULT_NEGATIVE_TTL = 5.0
+
+
+class UserCache:
+    """Thread-safe LRU of user_id -> UserResponse (None = known missing)
+
+    Cached messages are shared between callers and must not be modified.
+    Every invalidation bumps `generation`; a put made with the generation
+    read before the fetch started is dropped if an invalidation happened
+    meanwhile, so a slow fetch cannot re-cache data the change feed has
+    already replaced.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        if max_size < 1:
+            raise ValueError('Cache size must be at least 1')
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, user_id):
+        """Return (hit, user); user is None on a negative hit"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return True, user
+                del self._entries[user_id]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, user_id, user, generation=None):
+        """Cache a user, or None to remember that the ID does not exist"""
+        ttl = self.ttl if user is not None else self.negative_ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[user_id] = (time.monotonic() + ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Size and hit/miss/eviction counters"""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
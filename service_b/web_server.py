@@ -2,20 +2,45 @@
 Service B - Web Interface (Port 8002)
 FastAPI web UI for gRPC Client Demo
 """
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import grpc
+import json
 import sys
 import os
 
-# Add proto directory to path
+# Add proto and shared directories to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'proto'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
 
 import user_pb2
 import user_pb2_grpc
+from channel_pool import ChannelPool, DEFAULT_TIMEOUT, STREAM_TIMEOUT
+from etag import make_etag, parse_etag
+from singleflight import SingleFlight
+from metrics import REGISTRY, CONTENT_TYPE, ClientMetricsInterceptor, MetricsMiddleware
 
-app = FastAPI(title="Service B - gRPC Client", version="1.0.0")
+USER_SERVICE_TARGET = os.environ.get('USER_SERVICE_TARGET', 'localhost:50051')
+
+# Shared gRPC channels, opened on startup and closed on shutdown
+channels = None
+
+# (store version, JSON body) of the last full /api/users response
+users_cache = None
+
+# Concurrent identical upstream reads share one in-flight RPC
+inflight = SingleFlight()
+
+@asynccontextmanager
+async def lifespan(app):
+    global channels
+    channels = ChannelPool(interceptors=[ClientMetricsInterceptor()])
+    yield
+    await channels.close()
+    channels = None
+
+app = FastAPI(title="Service B - gRPC Client", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,9 +50,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route, served at /metrics
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 def get_user_service_stub():
-    channel = grpc.insecure_channel('localhost:50051')
-    return user_pb2_grpc.UserServiceStub(channel)
+    """Borrow a UserService stub (grpc.aio) from the shared channel pool"""
+    return channels.stub(USER_SERVICE_TARGET, user_pb2_grpc.UserServiceStub)
+
+def user_to_dict(user):
+    """Convert a UserResponse message to a JSON-ready dict"""
+    return {
+        "user_id": user.user_id,
+        "name": user.name,
+        "email": user.email,
+        "age": user.age,
+        "created_at": user.created_at
+    }
 
 @app.get("/", response_class=HTMLResponse)
 async def home():
@@ -192,9 +230,9 @@ async def home():
 async def test_grpc():
     """Test gRPC connection"""
     try:
-        stub = get_user_service_stub()
-        request = user_pb2.Empty()
-        response = stub.ListUsers(request)
+        request = user_pb2.ListUsersRequest()
+        with get_user_service_stub() as stub:
+            response = await stub.ListUsers(request, timeout=DEFAULT_TIMEOUT)
         
         return {
             "status": "success",
@@ -207,26 +245,66 @@ async def test_grpc():
         }
 
 @app.get("/api/users")
-async def list_users():
+async def list_users(request: Request):
     """Get all users from Service A"""
+    # Conditional GET: the ETag is the store version. Upstream is asked
+    # with the version we (or the client) already hold, so an unchanged
+    # table costs a tiny not_modified reply instead of a full listing.
+    global users_cache
+    client_version = parse_etag(request.headers.get("if-none-match"))
+    cached = users_cache
     try:
-        stub = get_user_service_stub()
-        request = user_pb2.Empty()
-        response = stub.ListUsers(request)
+        if_version = cached[0] if cached else client_version
         
-        users = []
-        for user in response.users:
-            users.append({
-                "user_id": user.user_id,
-                "name": user.name,
-                "email": user.email,
-                "age": user.age,
-                "created_at": user.created_at
-            })
+        async def fetch():
+            with get_user_service_stub() as stub:
+                return await stub.ListUsers(
+                    user_pb2.ListUsersRequest(if_version=if_version), timeout=DEFAULT_TIMEOUT
+                )
         
-        return {"users": users}
+        response = await inflight.do(('ListUsers', if_version), fetch)
     except Exception as e:
         return {"users": [], "error": str(e)}
+    
+    headers = {"ETag": make_etag(response.version), "Cache-Control": "no-cache"}
+    if client_version and client_version == response.version:
+        return Response(status_code=304, headers=headers)
+    
+    if response.not_modified:
+        body = cached[1]
+    else:
+        body = json.dumps(
+            {"users": [user_to_dict(user) for user in response.users]},
+            ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+        users_cache = (response.version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/users/stream")
+async def stream_users():
+    """Stream all users as NDJSON, one user per line"""
+    async def generate():
+        with get_user_service_stub() as stub:
+            call = stub.StreamUsers(user_pb2.ListUsersRequest(), timeout=STREAM_TIMEOUT)
+            try:
+                async for user in call:
+                    yield json.dumps(user_to_dict(user), ensure_ascii=False, separators=(',', ':')) + '\n'
+            except Exception as e:
+                yield json.dumps({"error": str(e)}, ensure_ascii=False) + '\n'
+            finally:
+                call.cancel()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get("/api/stats")
+async def gateway_stats():
+    """Gateway connection statistics"""
+    return {"channels": channels.stats(), "singleflight": inflight.stats()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics of this process"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 def serve():
     """Start the web server"""
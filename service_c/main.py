@@ -2,6 +2,8 @@
 Service C - gRPC Server + Web Interface
 Main entry point with both gRPC and HTTP server
 """
+import argparse
+import asyncio
 import threading
 import grpc
 from concurrent import futures
@@ -9,10 +11,12 @@ import time
 import sys
 import os
 
-# Add current directory to path
+# Add current and shared directories to path
 sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
 
 import schema_pb2, schema_pb2_grpc
+from metrics import MetricsInterceptor, AsyncMetricsInterceptor
 
 class ServiceCHandler(schema_pb2_grpc.MyServiceServicer):
     def GetData(self, request, context):
@@ -21,27 +25,79 @@ class ServiceCHandler(schema_pb2_grpc.MyServiceServicer):
             message=f"สวัสดี {request.name}, นี่คือข้อมูลจาก Server C (gRPC System)"
         )
 
-def serve_grpc():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+# Accept the keepalive pings sent by the gateway's pooled channels
+SERVER_OPTIONS = [
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.min_recv_ping_interval_without_data_ms', 20000),
+    ('grpc.http2.max_ping_strikes', 0),
+]
+
+class AsyncServiceCHandler(ServiceCHandler):
+    async def GetData(self, request, context):
+        return ServiceCHandler.GetData(self, request, context)
+
+# TCP address served when no --listen is given
+DEFAULT_ADDRESS = '[::]:50052'
+
+def serve_grpc(mode='thread', max_concurrent_rpcs=None, listen=None):
+    listen = listen or [DEFAULT_ADDRESS]
+    if mode == 'aio':
+        asyncio.run(serve_grpc_async(max_concurrent_rpcs, listen))
+        return
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        options=SERVER_OPTIONS,
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
+        interceptors=[MetricsInterceptor()]
+    )
     schema_pb2_grpc.add_MyServiceServicer_to_server(ServiceCHandler(), server)
-    server.add_insecure_port('[::]:50052')
-    print("🚀 Server C (gRPC) เริ่มทำงานที่ port 50052...")
+    for address in listen:
+        server.add_insecure_port(address)
+    print(f"🚀 Server C (gRPC) เริ่มทำงานที่ {', '.join(listen)}...")
     server.start()
     try:
         while True: time.sleep(86400)
     except KeyboardInterrupt: server.stop(0)
 
+async def serve_grpc_async(max_concurrent_rpcs=None, listen=None):
+    listen = listen or [DEFAULT_ADDRESS]
+    server = grpc.aio.server(options=SERVER_OPTIONS, maximum_concurrent_rpcs=max_concurrent_rpcs,
+                             interceptors=[AsyncMetricsInterceptor()])
+    schema_pb2_grpc.add_MyServiceServicer_to_server(AsyncServiceCHandler(), server)
+    for address in listen:
+        server.add_insecure_port(address)
+    print(f"🚀 Server C (gRPC asyncio) เริ่มทำงานที่ {', '.join(listen)}...")
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        await server.stop(0)
+
 def serve_web():
     from web_server import serve
     serve()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Service C - gRPC + Web')
+    parser.add_argument('--grpc-mode', choices=['thread', 'aio'], default='thread',
+                        help='gRPC server implementation (default: thread)')
+    parser.add_argument('--max-concurrent-rpcs', type=int, default=None,
+                        help='Reject RPCs beyond this many in flight (default: unlimited)')
+    parser.add_argument('--listen', action='append', default=None, metavar='ADDRESS',
+                        help='Address to serve on, host:port or unix:PATH; repeat for several '
+                             f'(default: {DEFAULT_ADDRESS})')
+    args = parser.parse_args()
+    
     print('=' * 50)
     print('Starting Service C')
     print('=' * 50)
     
     # Start gRPC server in a separate thread
-    grpc_thread = threading.Thread(target=serve_grpc, daemon=True)
+    grpc_thread = threading.Thread(
+        target=serve_grpc,
+        args=(args.grpc_mode, args.max_concurrent_rpcs, args.listen),
+        daemon=True
+    )
     grpc_thread.start()
     
     # Start web server in main thread
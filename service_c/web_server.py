@@ -2,21 +2,37 @@
 Service C - Web Interface (Port 8003)
 FastAPI web UI for Data Service
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import grpc
 import sys
 import os
 
-# Add current directory to path
+# Add current and shared directories to path
 sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
 
 import schema_pb2
 import schema_pb2_grpc
+from channel_pool import ChannelPool, DEFAULT_TIMEOUT
+from metrics import REGISTRY, CONTENT_TYPE, ClientMetricsInterceptor, MetricsMiddleware
 
-app = FastAPI(title="Service C - Data Service", version="1.0.0")
+SERVICE_C_TARGET = os.environ.get('SERVICE_C_TARGET', 'localhost:50052')
+
+# Shared gRPC channels, opened on startup and closed on shutdown
+channels = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global channels
+    channels = ChannelPool(interceptors=[ClientMetricsInterceptor()])
+    yield
+    await channels.close()
+    channels = None
+
+app = FastAPI(title="Service C - Data Service", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,12 +42,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route, served at /metrics
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 class DataRequest(BaseModel):
     name: str
 
 def get_service_c_stub():
-    channel = grpc.insecure_channel('localhost:50052')
-    return schema_pb2_grpc.MyServiceStub(channel)
+    """Borrow a MyService stub (grpc.aio) from the shared channel pool"""
+    return channels.stub(SERVICE_C_TARGET, schema_pb2_grpc.MyServiceStub)
 
 @app.get("/", response_class=HTMLResponse)
 async def home():
@@ -191,14 +210,24 @@ async def home():
 async def call_service(request: DataRequest):
     """Call Service C gRPC"""
     try:
-        stub = get_service_c_stub()
         grpc_request = schema_pb2.RequestMsg(name=request.name)
-        response = stub.GetData(grpc_request)
+        with get_service_c_stub() as stub:
+            response = await stub.GetData(grpc_request, timeout=DEFAULT_TIMEOUT)
         
         return {"message": response.message}
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/api/stats")
+async def gateway_stats():
+    """Gateway connection statistics"""
+    return {"channels": channels.stats()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics of this process"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 def serve():
     """Start the web server"""
     import uvicorn